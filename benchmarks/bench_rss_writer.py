@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RSS写入性能对比：流式写出 vs minidom + toprettyxml
+同时校验两者输出逐字节一致
+
+用法：python benchmarks/bench_rss_writer.py [条目数] [重复次数]
+"""
+
+import io
+import os
+import sys
+import time
+from xml.dom import minidom
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rss_writer import FEED_LINK, DEFAULT_CHANNEL, _write_feed
+
+def _sample_items(count):
+    """构造与实际摘要长度相近的条目"""
+    description = "<br>".join(
+        [f"【台北市】今日天气：短暫陣雨或雷雨，25 ~ 33℃ & 偏南风 <{i}>" for i in range(12)]
+        + ["⚠️ 当前预警摘要：豪雨特报覆盖台中市、高雄市、台南市（15:05-23:00）"] * 4
+    )
+    return [
+        (f"天气预报 <台北> & \"新北\"（2026-10-{i % 28 + 1:02d} 08:00）（未来 15 小时预报）",
+         "Sun, 18 Oct 2026 00:00:00 GMT",
+         f"weather-{i:016x}",
+         description)
+        for i in range(count)
+    ]
+
+def render_minidom(items):
+    """原实现：构建完整DOM后 toprettyxml"""
+    impl = minidom.getDOMImplementation()
+    doc = impl.createDocument(None, "rss", None)
+    rss = doc.documentElement
+    rss.setAttribute("version", "2.0")
+    rss.setAttribute("xmlns:atom", "http://www.w3.org/2005/Atom")
+
+    channel = doc.createElement("channel")
+    rss.appendChild(channel)
+
+    def el(tag, text):
+        node = doc.createElement(tag)
+        node.appendChild(doc.createTextNode(text))
+        return node
+
+    channel.appendChild(el("title", "天气快讯"))
+    channel.appendChild(el("link", FEED_LINK))
+    channel.appendChild(el("description", "台北新北天气、大雨城市与预警"))
+
+    atom_link = doc.createElement("atom:link")
+    atom_link.setAttribute("href", FEED_LINK)
+    atom_link.setAttribute("rel", "self")
+    atom_link.setAttribute("type", "application/rss+xml")
+    channel.appendChild(atom_link)
+
+    for title, pub_date, guid_text, html_description in items:
+        item = doc.createElement("item")
+        item.appendChild(el("title", title))
+        item.appendChild(el("pubDate", pub_date))
+        guid = doc.createElement("guid")
+        guid.setAttribute("isPermaLink", "false")
+        guid.appendChild(doc.createTextNode(guid_text))
+        item.appendChild(guid)
+        desc = doc.createElement("description")
+        desc.appendChild(doc.createCDATASection(html_description))
+        item.appendChild(desc)
+        channel.appendChild(item)
+
+    return doc.toprettyxml(indent="  ")
+
+def render_streaming(items):
+    """新实现：直接写入文件句柄"""
+    f = io.StringIO()
+    _write_feed(f, DEFAULT_CHANNEL, items)
+    return f.getvalue()
+
+def _best_of(func, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    counts = [int(sys.argv[1])] if len(sys.argv) > 1 else [1, 20, 200, 2000]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    for count in counts:
+        items = _sample_items(count)
+        if render_minidom(items) != render_streaming(items):
+            print(f"❌ {count} 条：输出不一致")
+            sys.exit(1)
+        dom_time = _best_of(render_minidom, items, repeat)
+        stream_time = _best_of(render_streaming, items, repeat)
+        print(f"{count:>5} 条  minidom {dom_time * 1000:8.2f} ms  流式 {stream_time * 1000:8.2f} ms  "
+              f"加速 {dom_time / stream_time:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试数据集
+生成与中央气象署接口结构一致的匿名数据（可按倍数放大，模拟台风日），或录制/读取真实响应
+
+用法：
+  python benchmarks/fixtures.py generate <目录> [--scale N] [--typhoon]
+  python benchmarks/fixtures.py record <目录>      # 需要 CWA_API_KEY，录制当前真实响应
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 全台县市（县市预报和地区预警使用真实名称，其余地名均为合成）
+COUNTIES = ["臺北市", "新北市", "桃園市", "臺中市", "臺南市", "高雄市", "基隆市", "新竹市", "新竹縣", "苗栗縣", "彰化縣",
+            "南投縣", "雲林縣", "嘉義市", "嘉義縣", "屏東縣", "宜蘭縣", "花蓮縣", "臺東縣", "澎湖縣", "金門縣", "連江縣"]
+
+# 比例为1时的数据规模（接近平日的真实规模）
+BASE_STATIONS = 500
+BASE_DISTRICTS = 12
+BASE_EARTHQUAKES = 5
+BASE_SPECIAL_REPORTS = 2
+BASE_CLIMATE_STATIONS = 30
+
+# 乡镇预报覆盖 72 小时，每 3 小时一个时段
+TOWNSHIP_HOURS = 72
+
+WEATHER_TEXTS = ["晴", "多雲", "陰", "短暫陣雨", "午後短暫雷陣雨", "短暫陣雨或雷雨", "陣雨", "大雷雨"]
+TYPHOON_TEXTS = ["颱風", "豪雨", "大雨", "強風", "陣雨或雷雨", "大雷雨"]
+HAZARDS = ["大雨", "豪雨", "大豪雨", "陸上強風", "低溫", "高溫"]
+
+def all_dataset_ids():
+    """代码用到的全部数据集（服务模块在导入时读取配置，按需导入以便调用方先设置环境变量）"""
+    from services.city_config import CITIES
+    from services.warning_fetcher import MAIN_CITY_TOWNSHIP_DATASETS
+
+    ids = ["F-C0032-001", "E-A0015-001", "E-A0016-001", "W-C0033-001", "W-C0033-002",
+           "W-C0034-005", "O-A0002-001", "O-A0003-001", "C-B0025-001"]
+    ids += [c["dataset_id"] for c in CITIES.values()]
+    ids += list(MAIN_CITY_TOWNSHIP_DATASETS.values())
+    return list(dict.fromkeys(ids))
+
+def _ok(records):
+    return {"success": "true", "result": {"resource_id": "", "fields": []}, "records": records}
+
+def _county_forecast(rng, now, scale, typhoon):
+    texts = TYPHOON_TEXTS if typhoon else WEATHER_TEXTS
+    names = COUNTIES + [f"合成縣{i:03d}" for i in range(len(COUNTIES) * (scale - 1))]
+    start = now.replace(minute=0, second=0, microsecond=0)
+    periods = [(start + timedelta(hours=12 * i), start + timedelta(hours=12 * (i + 1))) for i in range(3)]
+
+    def element(name, values):
+        return {"elementName": name, "time": [
+            {"startTime": s.strftime("%Y-%m-%d %H:%M:%S"), "endTime": e.strftime("%Y-%m-%d %H:%M:%S"),
+             "parameter": {"parameterName": v, "parameterValue": str(rng.randint(1, 40))}}
+            for (s, e), v in zip(periods, values)
+        ]}
+
+    locations = []
+    for name in names:
+        min_t = [rng.randint(18, 27) for _ in periods]
+        locations.append({"locationName": name, "weatherElement": [
+            element("Wx", [rng.choice(texts) for _ in periods]),
+            element("PoP", [str(rng.randrange(0, 101, 10)) for _ in periods]),
+            element("MinT", [str(t) for t in min_t]),
+            element("CI", ["舒適" for _ in periods]),
+            element("MaxT", [str(t + rng.randint(3, 9)) for t in min_t])
+        ]})
+    return _ok({"datasetDescription": "三十六小時天氣預報", "location": locations})
+
+def _township_forecast(rng, now, scale, typhoon, city_name):
+    texts = TYPHOON_TEXTS if typhoon else WEATHER_TEXTS
+    start = now.replace(hour=now.hour - now.hour % 3, minute=0, second=0, microsecond=0)
+    slots = [start + timedelta(hours=h) for h in range(0, TOWNSHIP_HOURS, 3)]
+
+    def iso(t):
+        return t.strftime("%Y-%m-%dT%H:%M:%S+08:00")
+
+    districts = []
+    for d in range(BASE_DISTRICTS * scale):
+        temps = [rng.randint(22, 34) for _ in slots]
+        weather = [rng.choice(texts) for _ in slots]
+        pops = [rng.randrange(0, 101, 10) for _ in slots]
+        districts.append({"locationName": f"合成{d:03d}區", "geocode": f"{6300000 + d}", "weatherElement": [
+            {"elementName": "溫度", "time": [
+                {"DataTime": iso(t), "elementValue": [{"Temperature": str(v)}]} for t, v in zip(slots, temps)]},
+            {"elementName": "天氣現象", "time": [
+                {"StartTime": iso(t), "EndTime": iso(t + timedelta(hours=3)),
+                 "elementValue": [{"Weather": w, "WeatherCode": str(WEATHER_TEXTS.index(w) + 1 if w in WEATHER_TEXTS else 15)}]}
+                for t, w in zip(slots, weather)]},
+            {"elementName": "3小時降雨機率", "time": [
+                {"StartTime": iso(t), "EndTime": iso(t + timedelta(hours=3)),
+                 "elementValue": [{"ProbabilityOfPrecipitation": str(p)}]} for t, p in zip(slots, pops)]},
+            {"elementName": "天氣預報綜合描述", "time": [
+                {"StartTime": iso(t), "EndTime": iso(t + timedelta(hours=3)), "elementValue": [{"WeatherDescription":
+                    f"{w}。降雨機率{p}%。溫度攝氏{v}度。相對濕度{rng.randint(60, 95)}%。偏南風 平均風速{rng.randint(1, 6)}級。"}]}
+                for t, w, p, v in zip(slots, weather, pops, temps)]}
+        ]})
+    return _ok({"locations": [{"datasetDescription": "鄉鎮天氣預報", "locationsName": city_name, "location": districts}]})
+
+def _stations(rng, now, scale, typhoon, rain_gauge):
+    stations = []
+    obs_time = now.replace(minute=now.minute - now.minute % 10, second=0, microsecond=0)
+    for i in range(BASE_STATIONS * scale):
+        county = COUNTIES[i % len(COUNTIES)]
+        rain_scale = 4 if typhoon else 1
+        rain_now = rng.choice([-998, 0, 0, 0.5, 2, 12]) * rain_scale
+        temp = rng.choice([-99, rng.uniform(5, 39)]) if rng.random() < 0.02 else rng.uniform(18, 36)
+        station = {
+            "StationName": f"合成站{i:05d}",
+            "StationId": f"C{'R' if rain_gauge else 'S'}{i:05d}",
+            "ObsTime": {"DateTime": obs_time.strftime("%Y-%m-%dT%H:%M:%S+08:00")},
+            "GeoInfo": {
+                "Coordinates": [
+                    {"CoordinateName": "TWD67", "CoordinateFormat": "decimal degrees",
+                     "StationLatitude": 0, "StationLongitude": 0},
+                    {"CoordinateName": "WGS84", "CoordinateFormat": "decimal degrees",
+                     "StationLatitude": round(rng.uniform(21.9, 25.3), 4), "StationLongitude": round(rng.uniform(120.0, 122.0), 4)}
+                ],
+                "StationAltitude": str(rng.randint(0, 3000)),
+                "CountyName": county,
+                "TownName": f"合成{i % BASE_DISTRICTS:03d}區",
+                "CountyCode": "", "TownCode": ""
+            },
+            "WeatherElement": [
+                {"ElementName": "TEMP", "ElementValue": f"{temp:.1f}"},
+                {"ElementName": "HUMD", "ElementValue": f"{rng.uniform(0.5, 1):.2f}"},
+                {"ElementName": "WDSD", "ElementValue": f"{rng.uniform(0, 30 if typhoon else 12):.1f}"},
+                {"ElementName": "H_24R", "ElementValue": f"{rng.uniform(0, 400 if typhoon else 60):.1f}"},
+                {"ElementName": "RAIN", "ElementValue": f"{rng.uniform(0, 90 if typhoon else 25):.1f}"}
+            ],
+            "RainfallElement": {
+                "Now": {"Precipitation": rain_now},
+                "Past10Min": {"Precipitation": max(rain_now, 0) / 6},
+                "Past1hr": {"Precipitation": rng.uniform(0, 80 if typhoon else 20)},
+                "Past24hr": {"Precipitation": rng.uniform(0, 500 if typhoon else 60)}
+            }
+        }
+        stations.append(station)
+    return _ok({"Station": stations})
+
+def _earthquakes(rng, now, scale, small):
+    quakes = []
+    for i in range(BASE_EARTHQUAKES * scale):
+        origin = now - timedelta(minutes=rng.randint(1, 5 * 24 * 60))
+        quakes.append({
+            "EarthquakeNo": 115000 + i if not small else 0,
+            "ReportType": "地震報告",
+            "ReportContent": f"合成地震報告{i}",
+            "EarthquakeInfo": {
+                "OriginTime": origin.strftime("%Y-%m-%d %H:%M:%S"),
+                "Source": "中央氣象署",
+                "FocalDepth": round(rng.uniform(5, 60), 1),
+                "Depth": {"DepthValue": round(rng.uniform(5, 60), 1)},
+                "Epicenter": {"Location": f"{rng.choice(COUNTIES)}合成地點{i}", "EpicenterLatitude": 23.5, "EpicenterLongitude": 121.5},
+                "Magnitude": {"MagnitudeType": "芮氏規模", "MagnitudeValue": round(rng.uniform(3.0, 6.5), 1)}
+            }
+        })
+    return _ok({"Earthquake": quakes})
+
+def _hazards(rng, now, scale, typhoon):
+    locations = []
+    names = COUNTIES + [f"合成縣{i:03d}" for i in range(len(COUNTIES) * (scale - 1))]
+    for name in names:
+        count = rng.randint(1, 3) if typhoon else (1 if rng.random() < 0.2 else 0)
+        hazards = []
+        for _ in range(count):
+            start = now - timedelta(hours=rng.randint(0, 6))
+            hazards.append({
+                "info": {"language": "zh-TW", "phenomena": rng.choice(HAZARDS), "significance": "特報"},
+                "validTime": {"startTime": start.strftime("%Y-%m-%d %H:00:00"),
+                              "endTime": (start + timedelta(hours=12)).strftime("%Y-%m-%d %H:00:00")}
+            })
+        locations.append({"locationName": name, "geocode": "", "hazardConditions": {"hazards": hazards}})
+    return _ok({"location": locations})
+
+def _special_reports(rng, now, scale, typhoon):
+    reports = []
+    for i in range(BASE_SPECIAL_REPORTS * scale * (3 if typhoon else 1)):
+        phenomena = rng.choice(HAZARDS)
+        issue = now - timedelta(hours=rng.randint(0, 12))
+        areas = rng.sample(COUNTIES, rng.randint(2, 8))
+        reports.append({
+            "datasetInfo": {
+                "datasetDescription": f"{phenomena}特報",
+                "issueTime": issue.strftime("%Y-%m-%d %H:%M:%S"),
+                "update": issue.strftime("%Y-%m-%d %H:%M:%S"),
+                "validTime": {"startTime": issue.strftime("%Y-%m-%d %H:%M:%S"),
+                              "endTime": (issue + timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")}
+            },
+            "contents": {"content": {"contentLanguage": "zh-TW",
+                                     "contentText": f"合成特報{i}：{'、'.join(areas)}今明兩天有{phenomena}發生的機率，請注意。"}},
+            "hazardConditions": {"hazards": {"hazard": [
+                {"info": {"language": "zh-TW", "phenomena": phenomena, "significance": "特報",
+                          "affectedAreas": {"location": [{"locationName": area} for area in areas]}}}
+            ]}}
+        })
+    return _ok({"record": reports})
+
+def _typhoons(rng, now, scale, typhoon):
+    if not typhoon:
+        return _ok({"tropicalCyclones": {}})
+    fixes = []
+    for i in range(10 * scale):
+        fix_time = now - timedelta(hours=3 * (10 * scale - i))
+        fixes.append({
+            "fixTime": fix_time.strftime("%Y-%m-%dT%H:%M:%S+08:00"),
+            "coordinate": f"{124 - i * 0.02:.2f},{20 + i * 0.02:.2f}",
+            "maxWindSpeed": str(rng.randint(25, 55)),
+            "maxGustSpeed": str(rng.randint(30, 70)),
+            "pressure": str(rng.randint(930, 990)),
+            "movingSpeed": "15",
+            "movingDirection": "NW"
+        })
+    return _ok({"tropicalCyclones": {"tropicalCyclone": [
+        {"year": now.year, "typhoonName": "SYNTHETIC", "cwaTyphoonName": "合成", "cwaTdNo": "01",
+         "analysisData": {"fix": fixes}}
+    ]}})
+
+def _climate(rng, now, scale):
+    locations = []
+    for i in range(BASE_CLIMATE_STATIONS * scale):
+        locations.append({
+            "station": {"StationID": f"46{i:04d}", "StationName": f"合成氣候站{i:04d}"},
+            "stationObsTimes": {"stationObsTime": [{"Date": now.strftime("%Y-%m")}]},
+            "stationObsStatistics": {"AirTemperature": [
+                {"Precipitation": [{"Precipitation": "Monthly", "PrecipitationValue": str(rng.choice([0, 12.5, 230.0]))}]}
+            ]}
+        })
+    return _ok({"location": locations})
+
+def generate_payloads(scale=1, typhoon=False, seed=0, now=None):
+    """
+    生成全部数据集的合成响应
+    :param scale: 数据规模倍数（测站、乡镇、地震、预警等数量按比例放大）
+    :param typhoon: 是否模拟台风日（台风路径、大范围特报、强降雨）
+    :return: {数据集ID: 响应字节}
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    payloads = {
+        "F-C0032-001": _county_forecast(rng, now, scale, typhoon),
+        "E-A0015-001": _earthquakes(rng, now, scale, small=False),
+        "E-A0016-001": _earthquakes(rng, now, scale, small=True),
+        "W-C0033-001": _hazards(rng, now, scale, typhoon),
+        "W-C0033-002": _special_reports(rng, now, scale, typhoon),
+        "W-C0034-005": _typhoons(rng, now, scale, typhoon),
+        "O-A0002-001": _stations(rng, now, scale, typhoon, rain_gauge=False),
+        "O-A0003-001": _stations(rng, now, scale, typhoon, rain_gauge=True),
+        "C-B0025-001": _climate(rng, now, scale)
+    }
+    for dataset_id in all_dataset_ids():
+        if dataset_id.startswith("F-D0047"):
+            payloads[dataset_id] = _township_forecast(rng, now, scale, typhoon, dataset_id)
+    return {dataset_id: json.dumps(data, ensure_ascii=False).encode("utf-8") for dataset_id, data in payloads.items()}
+
+def save_payloads(payloads, directory):
+    """每个数据集保存为 <目录>/<数据集ID>.json"""
+    os.makedirs(directory, exist_ok=True)
+    for dataset_id, content in payloads.items():
+        with open(os.path.join(directory, f"{dataset_id}.json"), "wb") as f:
+            f.write(content)
+
+def load_payloads(directory):
+    """读取目录中录制或生成的数据集"""
+    payloads = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename), "rb") as f:
+                payloads[filename[:-5]] = f.read()
+    return payloads
+
+def record_payloads(directory):
+    """录制当前真实响应（请求参数中的 API Key 不会写入文件）"""
+    from services.cwa_datastore import fetch_dataset_entry
+    payloads = {}
+    for dataset_id in all_dataset_ids():
+        try:
+            payloads[dataset_id] = fetch_dataset_entry(dataset_id, timeout=30).content
+            print(f"✅ 录制 {dataset_id}：{len(payloads[dataset_id]) / 1024:.1f} KB")
+        except Exception as e:
+            print(f"❌ 录制 {dataset_id} 失败: {e}")
+    save_payloads(payloads, directory)
+    return payloads
+
+def main():
+    parser = argparse.ArgumentParser(description="生成或录制基准测试数据集")
+    parser.add_argument("command", choices=["generate", "record"])
+    parser.add_argument("directory")
+    parser.add_argument("--scale", type=int, default=1, help="数据规模倍数（默认1）")
+    parser.add_argument("--typhoon", action="store_true", help="模拟台风日")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_payloads(args.directory)
+        return
+    payloads = generate_payloads(args.scale, args.typhoon, args.seed)
+    save_payloads(payloads, args.directory)
+    total = sum(len(content) for content in payloads.values())
+    print(f"✅ 生成 {len(payloads)} 个数据集，共 {total / 1024 / 1024:.1f} MB → {args.directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地替身服务器
+在后台线程中提供中央气象署开放数据接口和豆包对话接口的离线替身，供基准测试使用：
+  GET  /api/v1/rest/datastore/<数据集ID>   返回预先加载的数据集响应（带 ETag，条件请求未变化时返回304）
+  POST /api/v3/chat/completions           按提示词中的城市返回格式与真实接口一致的总结
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATASTORE_PATH = "/api/v1/rest/datastore/"
+CHAT_PATH = "/api/v3/chat/completions"
+
+def _chat_reply(prompt):
+    """模拟豆包输出：批量总结按城市逐行返回，其余（预警摘要）返回固定文本"""
+    cities = re.findall(r"^=== (.+?) ===$", prompt, re.MULTILINE)
+    if cities:
+        return "\n".join(f"🌤️ **{city}未来两日**：多云短暂阵雨，25~33℃，外出携带雨具" for city in cities)
+    match = re.search(r"\*\*(.+?)未来两日", prompt)
+    if match:
+        return f"🌤️ **{match.group(1)}未来两日**：多云短暂阵雨，25~33℃，外出携带雨具"
+    return "⚠️ 豪雨特报持续，山区及沿海注意强降雨和强风。"
+
+class StubServer:
+    """
+    离线替身服务器
+    :param payloads: {数据集ID: 响应字节}
+    :param latency: 每个请求的模拟网络延迟（秒）
+    :param ai_latency: 豆包请求的模拟生成耗时（秒）
+    """
+
+    def __init__(self, payloads, latency=0.0, ai_latency=0.0):
+        self.payloads = payloads
+        self.latency = latency
+        self.ai_latency = ai_latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def cwa_api_base(self):
+        return f"{self.base_url}/api"
+
+    @property
+    def doubao_url(self):
+        return f"{self.base_url}{CHAT_PATH}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json; charset=utf-8", etag=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stub._count()
+                if stub.latency:
+                    time.sleep(stub.latency)
+                path = self.path.split("?", 1)[0]
+                content = stub.payloads.get(path[len(DATASTORE_PATH):]) if path.startswith(DATASTORE_PATH) else None
+                if content is None:
+                    self._send(404, b'{"success": "false"}')
+                    return
+                etag = f'"{hashlib.sha1(content).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", etag=etag)
+                    return
+                self._send(200, content, etag=etag)
+
+            def do_POST(self):
+                stub._count()
+                length = int(self.headers.get("Content-Length", "0"))
+                body = self.rfile.read(length)
+                if self.path != CHAT_PATH:
+                    self._send(404, b"{}")
+                    return
+                if stub.ai_latency:
+                    time.sleep(stub.ai_latency)
+                try:
+                    messages = json.loads(body)["messages"]
+                    prompt = messages[-1]["content"]
+                except (ValueError, KeyError, IndexError):
+                    self._send(400, b"{}")
+                    return
+                reply = {"choices": [{"index": 0, "message": {"role": "assistant", "content": _chat_reply(prompt)}}]}
+                self._send(200, json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+
+        return Handler
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
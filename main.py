@@ -1,6 +1,11 @@
-from services.cwa_weather_fetcher import fetch_weather_all
-from services.summary_builder import build_summary
-from utils.rss_writer import write_rss
+import argparse
+from services.cwa_weather_fetcher import fetch_weather_all, all_datasets
+from services.summary_builder import build_summary_sections, compose_summary
+from services.change_detector import detect_changes, has_changes, describe_changes, save_state
+from services.http_client import close_http_client
+from services.scheduler import run_daemon
+from services.metrics import write_report
+from utils.rss_writer import write_feeds
 from utils.notifier import send_bark, send_slack
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -8,20 +13,51 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-if __name__ == "__main__":
-    try:
-        data = fetch_weather_all()
-        title, summary = build_summary(data)
+def publish(data):
+    """生成摘要、写入RSS并推送通知；输入没有变化时直接跳过"""
+    snapshot, changes = detect_changes(data)
+    if changes is not None and not has_changes(changes):
+        print("⏭️ 预报和预警均无变化，跳过摘要生成和推送")
+        return
+
+    title, sections = build_summary_sections(data)
+    summary = compose_summary(sections)
+
+    now = datetime.now(ZoneInfo("Asia/Taipei"))
+    rss_title = f"{title}（{now.strftime('%Y-%m-%d %H:%M')}）"
 
-        now = datetime.now(ZoneInfo("Asia/Taipei"))
-        rss_title = f"{title}（{now.strftime('%Y-%m-%d %H:%M')}）"
+    write_feeds(rss_title, sections)
+    # 首次运行推送完整摘要，之后只推送变化部分
+    body = summary if changes is None else describe_changes(changes)
+    send_bark(rss_title, body)
+    send_slack(rss_title, body)
+    save_state(snapshot)
+    print("✅ RSS 已生成")
 
-        write_rss(rss_title, summary)
-        send_bark(rss_title, summary)
-        send_slack(rss_title, summary)
-        print("✅ RSS 已生成")
+def report_failure(e):
+    """推送生成失败通知"""
+    err_msg = f"❌ 生成失败：{e}"
+    send_bark("❌ RSS 生成失败", str(e))
+    send_slack("❌ RSS 生成失败", str(e))
+    print(err_msg)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="台湾天气 RSS 推送工具")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行：各数据集按各自频率轮询，有变化时才重新生成")
+    args = parser.parse_args()
+
+    ok = False
+    try:
+        if args.daemon:
+            run_daemon(all_datasets(), fetch_weather_all, publish, on_error=report_failure)
+        else:
+            publish(fetch_weather_all())
+            ok = True
+    except KeyboardInterrupt:
+        print("👋 已停止")
     except Exception as e:
-        err_msg = f"❌ 生成失败：{e}"
-        send_bark("❌ RSS 生成失败", str(e))
-        send_slack("❌ RSS 生成失败", str(e))
-        print(err_msg)
+        report_failure(e)
+    finally:
+        close_http_client()
+        if not args.daemon:
+            write_report(mode="once", ok=ok)
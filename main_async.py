@@ -0,0 +1,55 @@
+import asyncio
+from services.cwa_weather_fetcher import fetch_weather_all_async
+from services.summary_builder import build_summary_sections_async, compose_summary
+from services.change_detector import detect_changes, has_changes, describe_changes, save_state
+from services.http_client import close_http_client, close_async_http_client
+from utils.rss_writer import write_feeds
+from utils.notifier import send_bark_async, send_slack_async
+from services.metrics import write_report
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def run():
+    """异步入口：网络请求（含AI调用）走异步客户端，阻塞的变化检测和文件写入放到线程中执行"""
+    ok = False
+    try:
+        data = await fetch_weather_all_async()
+        snapshot, changes = await asyncio.to_thread(detect_changes, data)
+        if changes is not None and not has_changes(changes):
+            print("⏭️ 预报和预警均无变化，跳过摘要生成和推送")
+            ok = True
+            return
+
+        title, sections = await build_summary_sections_async(data)
+        summary = compose_summary(sections)
+
+        now = datetime.now(ZoneInfo("Asia/Taipei"))
+        rss_title = f"{title}（{now.strftime('%Y-%m-%d %H:%M')}）"
+
+        await asyncio.to_thread(write_feeds, rss_title, sections)
+        # 首次运行推送完整摘要，之后只推送变化部分
+        body = summary if changes is None else describe_changes(changes)
+        await asyncio.gather(
+            send_bark_async(rss_title, body),
+            send_slack_async(rss_title, body)
+        )
+        await asyncio.to_thread(save_state, snapshot)
+        print("✅ RSS 已生成")
+        ok = True
+    except Exception as e:
+        err_msg = f"❌ 生成失败：{e}"
+        await asyncio.gather(
+            send_bark_async("❌ RSS 生成失败", str(e)),
+            send_slack_async("❌ RSS 生成失败", str(e))
+        )
+        print(err_msg)
+    finally:
+        await close_async_http_client()
+        close_http_client()
+        write_report(mode="async", ok=ok)
+
+if __name__ == "__main__":
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入变化检测模块
+对规范化后的输入（各城市预报时段、按预警标识区分的预警）做指纹，与上一次运行的状态比较：
+新增预警、已解除预警、预报变化；没有变化时跳过摘要生成和推送
+"""
+
+import json
+import os
+from .city_config import get_cache_dir
+from .models import format_number
+from .warning_store import warning_id
+
+# 是否启用变化检测（设为0每次都生成并推送完整摘要）
+CHANGE_DETECTION_ENABLED = os.getenv("CHANGE_DETECTION", "1") != "0"
+
+# 状态格式版本，规范化规则变化时递增
+STATE_VERSION = 3
+
+# 推送的变化明细中每类最多列出的条数
+MAX_CHANGES_LISTED = 10
+
+STATE_FILENAME = "input_state.json"
+
+def _forecast_periods(city_data):
+    """城市预报按时段规范化：{时段: [天气, 温度, 降雨机率]}（数值按文本保存，与已保存的状态兼容）"""
+    periods = {}
+    for hour in city_data.get("hourly", []):
+        periods[hour.fx_time] = [hour.text, format_number(hour.temp), format_number(hour.precip)]
+    for day in city_data.get("weekly", []):
+        periods[day.fx_date] = [day.text_day, f"{format_number(day.temp_min)}~{format_number(day.temp_max)}", format_number(day.precip)]
+    return periods
+
+def snapshot_inputs(data):
+    """
+    规范化 fetch_weather_all 的结果（只包含 JSON 原生类型，可直接持久化）
+    :return: {"forecasts": {城市: {时段: [...]}}, "warnings": {标识: {"title", "city", "text"}}}
+    """
+    forecasts = {
+        city: _forecast_periods(city_data)
+        for city, city_data in data.items()
+        if city != "warnings" and isinstance(city_data, dict)
+    }
+    warnings = {}
+    for warning in data.get("warnings", []):
+        # 与预警生命周期存储使用同一标识（加入预警集合时生成）
+        warnings.setdefault(warning.id or warning_id(warning), {
+            "title": warning.title,
+            "city": warning.city,
+            "text": warning.text
+        })
+    return {"version": STATE_VERSION, "forecasts": forecasts, "warnings": warnings}
+
+def diff_inputs(previous, current):
+    """
+    比较两次输入快照
+    预报只比较两次都存在的时段，预报窗口随时间推移产生的新时段不算变化
+    :return: {"new_warnings": [...], "cleared_warnings": [...], "changed_forecasts": [(城市, 时段, 旧值, 新值), ...]}
+    """
+    old_warnings = previous.get("warnings", {})
+    new_warnings = current.get("warnings", {})
+    changed_forecasts = []
+    for city, periods in current.get("forecasts", {}).items():
+        old_periods = previous.get("forecasts", {}).get(city, {})
+        for period, values in periods.items():
+            old_values = old_periods.get(period)
+            if old_values is not None and old_values != values:
+                changed_forecasts.append((city, period, old_values, values))
+    return {
+        "new_warnings": [w for key, w in new_warnings.items() if key not in old_warnings],
+        "cleared_warnings": [w for key, w in old_warnings.items() if key not in new_warnings],
+        "changed_forecasts": changed_forecasts
+    }
+
+def has_changes(diff):
+    """变化是否为空"""
+    return any(diff.values())
+
+def describe_changes(diff):
+    """把变化整理成推送文本"""
+    lines = []
+
+    def section(header, items, render):
+        if not items:
+            return
+        lines.append(f"{header}（{len(items)}）")
+        lines.extend(f"• {render(item)}" for item in items[:MAX_CHANGES_LISTED])
+        if len(items) > MAX_CHANGES_LISTED:
+            lines.append(f"• …共 {len(items)} 条")
+
+    section("🆕 新增预警", diff["new_warnings"], lambda w: f"{w['title']}（{w['city']}）：{w['text']}")
+    section("✅ 已解除预警", diff["cleared_warnings"], lambda w: f"{w['title']}（{w['city']}）")
+    section("🔄 预报变化", diff["changed_forecasts"],
+            lambda c: f"{c[0]} {c[1]}：{' '.join(c[2])} → {' '.join(c[3])}")
+    return "\n".join(lines)
+
+def _state_path():
+    return os.path.join(get_cache_dir(), STATE_FILENAME)
+
+def load_state():
+    """读取上一次运行的输入快照，没有或格式不兼容时返回 None"""
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+def save_state(snapshot):
+    """保存本次运行的输入快照（推送成功后调用，失败的运行下次会重新推送）"""
+    path = _state_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ 写入输入状态失败: {e}")
+
+def detect_changes(data):
+    """
+    检测本次输入相对上一次运行的变化
+    :return: (本次快照, 变化；首次运行或未启用变化检测时为 None，表示按完整摘要处理)
+    """
+    snapshot = snapshot_inputs(data)
+    previous = load_state() if CHANGE_DETECTION_ENABLED else None
+    if previous is None:
+        return snapshot, None
+    return snapshot, diff_inputs(previous, snapshot)
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 城市配置模块
-包含目标城市配置和API密钥
+包含目标城市配置、API密钥和本地缓存目录
 """
 
 import os
@@ -14,19 +14,30 @@ load_dotenv()
 # 中央气象署 API Key
 CWA_API_KEY = os.getenv("CWA_API_KEY")
 
+# 本地缓存根目录（HTTP缓存等），可挂载为持久化卷
+CACHE_DIR = os.getenv("QWEATHER_CACHE_DIR", ".cache")
+
 # 目标城市配置
+# slug 用于城市订阅文件名；center 为城市中心经纬度，radius_km 可选：设置后半径内的观测站也归属该城市（默认读取 STATION_MATCH_RADIUS_KM）
+# district 可选：作为城市代表的乡镇区（如 "大安區"），默认取乡镇预报中的第一个区域
 CITIES = {
     "台北市": {
         "cwa_id": "臺北市",
-        "dataset_id": "F-D0047-061"  # 台北市乡镇预报
+        "dataset_id": "F-D0047-061",  # 台北市乡镇预报
+        "slug": "taipei",  # 城市订阅文件名 weather-taipei.xml
+        "center": (25.0375, 121.5637)
     },
     "新北市": {
         "cwa_id": "新北市",
-        "dataset_id": "F-D0047-069"  # 新北市乡镇预报
+        "dataset_id": "F-D0047-069",  # 新北市乡镇预报
+        "slug": "new-taipei",  # 城市订阅文件名 weather-new-taipei.xml
+        "center": (25.0120, 121.4657)
     },
     "桃园市": {
         "cwa_id": "桃園市", 
-        "dataset_id": "F-D0047-005"  # 桃园市乡镇预报
+        "dataset_id": "F-D0047-005",  # 桃园市乡镇预报
+        "slug": "taoyuan",  # 城市订阅文件名 weather-taoyuan.xml
+        "center": (24.9936, 121.3010)
     }
 }
 
@@ -40,4 +51,10 @@ def get_all_cities():
 
 def get_cwa_api_key():
     """获取CWA API密钥"""
-    return CWA_API_KEY 
\ No newline at end of file
+    return CWA_API_KEY
+
+def get_cache_dir(*parts):
+    """获取缓存目录（不存在时自动创建）"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
\ No newline at end of file
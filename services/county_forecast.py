@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+县市36小时预报模块
+一次下载全台湾 F-C0032-001 预报，并建立 县市 → 预报 的索引
+"""
+
+from .cwa_datastore import fetch_dataset_entry
+
+def county_forecast_datasets():
+    """县市预报需要的数据集列表：(数据集ID, 参数, 超时秒数)"""
+    return [("F-C0032-001", {}, 10)]
+
+def _build_county_index(data):
+    """按 locationName 建立县市预报索引"""
+    index = {}
+    if data.get("success") == "true":
+        records = data.get("records", {})
+        for location in records.get("location", []):
+            location_name = location.get("locationName", "")
+            if location_name:
+                index[location_name] = location
+    return index
+
+def fetch_county_forecast_index(timeout=10):
+    """获取全台湾县市预报索引（不带 locationName 的批量请求，同一份数据只建一次索引）"""
+    entry = fetch_dataset_entry("F-C0032-001", timeout=timeout)
+    return entry.derive("county_index", _build_county_index)
+
+def fetch_county_forecast(county_name, timeout=10):
+    """获取单个县市的36小时预报，不存在时返回 None"""
+    return fetch_county_forecast_index(timeout=timeout).get(county_name)
\ No newline at end of file
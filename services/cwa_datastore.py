@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中央气象署数据集访问模块
+统一的数据集下载入口，并在单次运行内按 (数据集ID, 参数) 去重缓存
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from . import http_cache
+from .metrics import record_cache, record_stage
+from .http_client import safe_request, async_safe_request
+from .city_config import get_cwa_api_key
+
+try:
+    import ijson
+except ImportError:  # 未安装时回退到完整解码
+    ijson = None
+
+# 中央气象署开放数据接口地址（可指向本地替身服务，用于离线基准测试）
+CWA_API_BASE = os.getenv("CWA_API_BASE", "https://opendata.cwa.gov.tw/api").rstrip("/")
+CWA_DATASTORE_URL = f"{CWA_API_BASE}/v1/rest/datastore"
+
+# 不参与缓存键的参数（每次请求都相同）
+_IGNORED_PARAMS = {"Authorization", "format"}
+
+class DatasetEntry:
+    """单个数据集响应：保存原始字节，JSON只在首次使用时解码一次"""
+
+    __slots__ = ("dataset_id", "params", "content", "_data", "_derived", "_lock")
+
+    def __init__(self, dataset_id, params, content):
+        self.dataset_id = dataset_id
+        self.params = params
+        self.content = content
+        self._data = None
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    def json(self):
+        """返回解码后的JSON（所有使用者共享同一份，只读）"""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    started = time.perf_counter()
+                    self._data = json.loads(self.content)
+                    record_stage(f"decode.{self.dataset_id}", time.perf_counter() - started)
+        return self._data
+
+    def derive(self, name, builder):
+        """基于本响应构建派生结构（如索引），每个名字只构建一次"""
+        if name not in self._derived:
+            data = self.json()
+            with self._lock:
+                if name not in self._derived:
+                    started = time.perf_counter()
+                    self._derived[name] = builder(data)
+                    record_stage(f"derive.{name}", time.perf_counter() - started)
+        return self._derived[name]
+
+    def field(self, key, default=None):
+        """读取顶层字段；JSON未解码时只流式解析到该字段为止"""
+        if self._data is not None or ijson is None:
+            return self.json().get(key, default)
+        return next(ijson.items(io.BytesIO(self.content), key, use_float=True), default)
+
+    def iter_items(self, *path):
+        """
+        逐个产出 path 指向的数组元素，如 iter_items("records", "Station")
+        已解码或未安装 ijson 时遍历完整JSON，否则流式解析，不构建整棵树
+        """
+        if self._data is not None or ijson is None:
+            node = self.json()
+            for key in path:
+                node = node.get(key, {}) if isinstance(node, dict) else {}
+            if isinstance(node, list):
+                yield from node
+            return
+        prefix = ".".join(path + ("item",))
+        yield from ijson.items(io.BytesIO(self.content), prefix, use_float=True)
+
+    def derive_items(self, name, path, builder):
+        """基于 path 指向的数组流式构建派生结构，每个名字只构建一次"""
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    started = time.perf_counter()
+                    self._derived[name] = builder(self.iter_items(*path))
+                    record_stage(f"derive.{name}", time.perf_counter() - started)
+        return self._derived[name]
+
+class _Slot:
+    """运行缓存中的一个位置：下载中的请求会在此等待，失败结果同样缓存"""
+
+    __slots__ = ("event", "entry", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+        self.error = None
+
+    def result(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.entry
+
+# 当前运行的缓存；为 None 表示未开启运行级缓存
+# 保存在上下文变量中：并发的多个运行（如嵌入异步服务时的多个 fetch_weather_all_async）各自独立，
+# 异步子任务和 asyncio.to_thread 自动继承，线程池中执行时需显式复制上下文
+_run_cache = contextvars.ContextVar("cwa_dataset_run_cache", default=None)
+_run_lock = threading.Lock()
+
+def dataset_key(dataset_id, params=None):
+    """生成缓存键：数据集ID + 规范化后的参数"""
+    items = []
+    for name, value in (params or {}).items():
+        if name in _IGNORED_PARAMS or value is None:
+            continue
+        items.append((name, str(value).strip()))
+    return (dataset_id, tuple(sorted(items)))
+
+@contextmanager
+def dataset_run():
+    """
+    开启一次运行的数据集缓存
+    同一运行内相同的数据集请求只下载和解码一次；支持嵌套，以最外层为准
+    """
+    if _run_cache.get() is not None:
+        yield
+        return
+    token = _run_cache.set({})
+    try:
+        yield
+    finally:
+        _run_cache.reset(token)
+
+def preload_datasets(entries):
+    """
+    把已下载的数据集条目放入本次运行的缓存（常驻模式复用各数据集最近一次的结果）
+    :param entries: [DatasetEntry, ...]
+    """
+    cache = _run_cache.get()
+    if cache is None:
+        raise RuntimeError("preload_datasets 需要在 dataset_run() 内调用")
+    for entry in entries:
+        slot = _Slot()
+        slot.entry = entry
+        slot.event.set()
+        with _run_lock:
+            cache.setdefault(dataset_key(entry.dataset_id, entry.params), slot)
+
+def _request_params(params):
+    """拼接请求参数（API Key + 格式 + 业务参数）"""
+    request_params = {
+        "Authorization": get_cwa_api_key(),
+        "format": "JSON"
+    }
+    request_params.update(params)
+    return request_params
+
+def _from_disk_cache(dataset_id, params, revalidate=False):
+    """
+    查询磁盘缓存
+    :param revalidate: 为 True 时忽略TTL有效期，总是发起条件请求
+    :return: (可直接使用的条目或 None, 需要重新验证的缓存或 None)
+    """
+    cached = http_cache.load(dataset_id, params)
+    if cached is not None and not revalidate and cached.is_fresh():
+        http_cache.record_hit()
+        record_cache(dataset_id, "hit")
+        return DatasetEntry(dataset_id, params, cached.read()), None
+    return None, cached
+
+def _handle_response(dataset_id, params, resp, cached):
+    """处理下载结果：304 复用本地副本，否则写入磁盘缓存"""
+    if resp.status_code == 304 and cached is not None:
+        cached.touch()
+        http_cache.record_revalidated()
+        record_cache(dataset_id, "revalidated")
+        return DatasetEntry(dataset_id, params, cached.read())
+    http_cache.store(dataset_id, params, resp.content, resp.headers)
+    http_cache.record_miss()
+    record_cache(dataset_id, "miss")
+    return DatasetEntry(dataset_id, params, resp.content)
+
+def _download(dataset_id, params, timeout, revalidate=False):
+    """下载数据集原始内容（优先使用磁盘缓存）"""
+    entry, cached = _from_disk_cache(dataset_id, params, revalidate)
+    if entry is not None:
+        return entry
+    headers = cached.conditional_headers() if cached is not None else None
+    resp = safe_request(f"{CWA_DATASTORE_URL}/{dataset_id}", params=_request_params(params), timeout=timeout, headers=headers, label=dataset_id)
+    return _handle_response(dataset_id, params, resp, cached)
+
+async def _download_async(dataset_id, params, timeout):
+    """异步下载数据集原始内容（优先使用磁盘缓存）"""
+    entry, cached = _from_disk_cache(dataset_id, params)
+    if entry is not None:
+        return entry
+    headers = cached.conditional_headers() if cached is not None else None
+    resp = await async_safe_request(f"{CWA_DATASTORE_URL}/{dataset_id}", params=_request_params(params), timeout=timeout, headers=headers, label=dataset_id)
+    return _handle_response(dataset_id, params, resp, cached)
+
+def fetch_dataset_entry(dataset_id, timeout=15, **params):
+    """获取数据集响应条目（运行内已下载则直接复用）"""
+    cache = _run_cache.get()
+    if cache is None:
+        return _download(dataset_id, params, timeout)
+
+    key = dataset_key(dataset_id, params)
+    with _run_lock:
+        slot = cache.get(key)
+        owner = slot is None
+        if owner:
+            slot = _Slot()
+            cache[key] = slot
+
+    # 只有第一个请求者下载，其他线程等待同一结果
+    if owner:
+        try:
+            slot.entry = _download(dataset_id, params, timeout)
+        except Exception as e:
+            slot.error = e
+        finally:
+            slot.event.set()
+    return slot.result()
+
+def revalidate_dataset_entry(dataset_id, timeout=15, **params):
+    """
+    向服务器确认数据集是否更新：总是发起请求（有本地副本时为条件请求，未变化返回304），
+    不使用TTL有效期内的本地副本，也不经过运行缓存；供按固定间隔轮询的常驻模式使用
+    """
+    return _download(dataset_id, params, timeout, revalidate=True)
+
+def fetch_dataset(dataset_id, timeout=15, **params):
+    """获取数据集并返回解码后的JSON"""
+    return fetch_dataset_entry(dataset_id, timeout=timeout, **params).json()
+
+async def fetch_dataset_entry_async(dataset_id, timeout=15, **params):
+    """fetch_dataset_entry 的异步版本，与同步调用共享运行缓存"""
+    cache = _run_cache.get()
+    if cache is None:
+        return await _download_async(dataset_id, params, timeout)
+
+    key = dataset_key(dataset_id, params)
+    with _run_lock:
+        slot = cache.get(key)
+        owner = slot is None
+        if owner:
+            slot = _Slot()
+            cache[key] = slot
+
+    if owner:
+        try:
+            slot.entry = await _download_async(dataset_id, params, timeout)
+        except Exception as e:
+            slot.error = e
+        except asyncio.CancelledError:
+            slot.error = TimeoutError(f"数据集 {dataset_id} 下载被取消")
+            raise
+        finally:
+            slot.event.set()
+    elif not slot.event.is_set():
+        # 其他线程正在下载，放到线程里等待，避免阻塞事件循环
+        await asyncio.to_thread(slot.event.wait)
+    return slot.result()
+
+async def fetch_dataset_async(dataset_id, timeout=15, **params):
+    """获取数据集并返回解码后的JSON（异步）"""
+    entry = await fetch_dataset_entry_async(dataset_id, timeout=timeout, **params)
+    return entry.json()
+
+def prefetch_datasets(datasets, max_workers=8, deadline=None):
+    """
+    并发预取数据集到本次运行的缓存
+    :param datasets: [(数据集ID, 参数, 超时秒数), ...]
+    :param max_workers: 最大并发数
+    :param deadline: 整体等待上限（秒），超时未完成的数据集在本次运行中视为失败
+    """
+    cache = _run_cache.get()
+    if cache is None:
+        raise RuntimeError("prefetch_datasets 需要在 dataset_run() 内调用")
+
+    unique = {}
+    for dataset_id, params, timeout in datasets:
+        unique.setdefault(dataset_key(dataset_id, params), (dataset_id, params, timeout))
+    if not unique:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cwa-fetch")
+    # 工作线程不继承上下文，复制当前上下文以使用同一运行缓存
+    context = contextvars.copy_context()
+    futures = {
+        executor.submit(context.copy().run, fetch_dataset_entry, dataset_id, timeout=timeout, **params): key
+        for key, (dataset_id, params, timeout) in unique.items()
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    # 超时的数据集标记为失败，后续使用者不再同步等待
+    for future in not_done:
+        slot = _Slot()
+        slot.error = TimeoutError(f"数据集 {futures[future][0]} 超过 {deadline} 秒未完成")
+        slot.event.set()
+        with _run_lock:
+            cache[futures[future]] = slot
+
+    failed = sum(1 for future in done if future.exception() is not None)
+    print(f"⚡ 并发预取 {len(unique)} 个数据集：成功 {len(done) - failed}，失败 {failed}，超时 {len(not_done)}")
+
+async def prefetch_datasets_async(datasets, max_concurrency=8, deadline=None):
+    """
+    prefetch_datasets 的异步版本
+    :param datasets: [(数据集ID, 参数, 超时秒数), ...]
+    :param max_concurrency: 最大并发请求数
+    :param deadline: 整体等待上限（秒），超时未完成的数据集在本次运行中视为失败
+    """
+    cache = _run_cache.get()
+    if cache is None:
+        raise RuntimeError("prefetch_datasets_async 需要在 dataset_run() 内调用")
+
+    unique = {}
+    for dataset_id, params, timeout in datasets:
+        unique.setdefault(dataset_key(dataset_id, params), (dataset_id, params, timeout))
+    if not unique:
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(dataset_id, params, timeout):
+        async with semaphore:
+            return await fetch_dataset_entry_async(dataset_id, timeout=timeout, **params)
+
+    tasks = {
+        asyncio.create_task(fetch_one(dataset_id, params, timeout)): key
+        for key, (dataset_id, params, timeout) in unique.items()
+    }
+    done, not_done = await asyncio.wait(tasks, timeout=deadline)
+
+    # 超时的数据集取消下载并标记为失败
+    for task in not_done:
+        task.cancel()
+        slot = _Slot()
+        slot.error = TimeoutError(f"数据集 {tasks[task][0]} 超过 {deadline} 秒未完成")
+        slot.event.set()
+        with _run_lock:
+            cache[tasks[task]] = slot
+
+    failed = sum(1 for task in done if task.exception() is not None)
+    print(f"⚡ 异步预取 {len(unique)} 个数据集：成功 {len(done) - failed}，失败 {failed}，超时 {len(not_done)}")
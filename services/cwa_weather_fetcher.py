@@ -5,12 +5,29 @@
 完全替代和风天气API，使用台湾官方气象数据
 """
 
-from .weather_fetcher import fetch_cwa_weather
-from .warning_fetcher import fetch_cwa_warnings
+import asyncio
+import os
+from .weather_fetcher import fetch_cwa_weather, city_datasets
+from .warning_fetcher import fetch_cwa_warnings, warning_datasets
+from .cwa_datastore import dataset_run, prefetch_datasets, prefetch_datasets_async
+from . import http_cache
 from .city_config import CITIES
+from .metrics import stage
 
-def fetch_weather_all():
-    """获取所有天气数据（完全使用中央气象署API）"""
+# 并发获取配置：最大并发数（<=1 时退化为串行获取）和整体等待上限（秒）
+FETCH_WORKERS = int(os.getenv("CWA_FETCH_WORKERS", "8"))
+FETCH_DEADLINE = float(os.getenv("CWA_FETCH_DEADLINE", "60"))
+
+def all_datasets():
+    """一次完整运行需要的所有数据集"""
+    datasets = []
+    for city_config in CITIES.values():
+        datasets += city_datasets(city_config)
+    return datasets + warning_datasets()
+
+@stage("parse")
+def _build_result():
+    """按固定顺序解析城市天气和预警，合并为结果字典"""
     result = {}
 
     # 获取中央气象署天气数据
@@ -36,4 +53,43 @@ def fetch_weather_all():
     else:
         print("✅ 当前无特殊天气提醒")
     
+    return result
+
+@stage("fetch")
+def fetch_weather_all(max_workers=None, deadline=None):
+    """
+    获取所有天气数据（完全使用中央气象署API）
+    :param max_workers: 并发下载数，默认读取 CWA_FETCH_WORKERS
+    :param deadline: 并发下载的整体等待上限（秒），默认读取 CWA_FETCH_DEADLINE
+    """
+    max_workers = FETCH_WORKERS if max_workers is None else max_workers
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+    http_cache.reset_stats()
+
+    # 同一次运行内相同的数据集只下载一次（城市预报与预警共用）
+    with dataset_run():
+        # 并发模式：先并发下载所有独立数据集，再按固定顺序串行解析，保证结果确定
+        if max_workers > 1:
+            prefetch_datasets(all_datasets(), max_workers=max_workers, deadline=deadline)
+        result = _build_result()
+
+    print(http_cache.format_stats())
+    return result
+
+@stage("fetch")
+async def fetch_weather_all_async(max_concurrency=None, deadline=None):
+    """
+    fetch_weather_all 的异步版本
+    所有数据集通过异步客户端并发下载，解析和合并在线程中按固定顺序执行，不阻塞事件循环
+    """
+    max_concurrency = FETCH_WORKERS if max_concurrency is None else max(1, max_concurrency)
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+    http_cache.reset_stats()
+
+    with dataset_run():
+        await prefetch_datasets_async(all_datasets(), max_concurrency=max_concurrency, deadline=deadline)
+        # 数据已在运行缓存中，串行解析不会再发起网络请求
+        result = await asyncio.to_thread(_build_result)
+
+    print(http_cache.format_stats())
     return result
\ No newline at end of file
@@ -1,17 +1,145 @@
-import requests
+import asyncio
 import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from services.http_client import get_http_client, get_async_http_client
+from services.city_config import get_cache_dir
+from services.metrics import stage, incr, record_request
 
 DOUBAO_API_KEY = os.getenv("DOUBAO_API_KEY")
-DOUBAO_API_URL = "https://ark.cn-beijing.volces.com/api/v3/chat/completions"
+DOUBAO_API_URL = os.getenv("DOUBAO_API_URL", "https://ark.cn-beijing.volces.com/api/v3/chat/completions")
 
-def call_doubao_ai(prompt, model="doubao-seed-1-6-flash-250615", temperature=0.2):
+SYSTEM_PROMPT = "你是一个专业的气象摘要助手，请将多条天气预警合并为简明、无重复的摘要，相同类型预警只保留一条。"
+
+# AI响应缓存：有效期（秒，设为0关闭）和最大条目数
+DOUBAO_CACHE_TTL = int(os.getenv("DOUBAO_CACHE_TTL", str(6 * 3600)))
+DOUBAO_CACHE_SIZE = int(os.getenv("DOUBAO_CACHE_SIZE", "128"))
+
+# 并发调用：最大同时请求数、每秒请求数上限（设为0不限速）和整体截止时间（秒）
+DOUBAO_MAX_IN_FLIGHT = int(os.getenv("DOUBAO_MAX_IN_FLIGHT", "4"))
+DOUBAO_RATE_PER_SEC = float(os.getenv("DOUBAO_RATE_PER_SEC", "2"))
+DOUBAO_DEADLINE = float(os.getenv("DOUBAO_DEADLINE", "45"))
+
+# 单次请求超时（秒）
+DOUBAO_TIMEOUT = 20
+
+class _RateLimiter:
+    """令牌桶限速：平均每秒最多 rate 个请求，允许 burst 个突发"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+_rate_limiter = _RateLimiter(DOUBAO_RATE_PER_SEC, DOUBAO_MAX_IN_FLIGHT)
+
+class _ResponseCache:
     """
-    调用火山引擎豆包大模型进行摘要/合成
-    :param prompt: 输入的文本内容
-    :param model: 使用的模型名称
-    :param temperature: 采样温度
-    :return: AI返回的摘要文本
+    按内容寻址的AI响应缓存
+    键为 (模型, 温度, 系统提示词, 规范化后的用户提示词) 的摘要，LRU淘汰，持久化到本地文件
     """
+
+    def __init__(self, filename, ttl, max_size):
+        self.filename = filename
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, temperature, system_prompt, prompt):
+        # 去掉行首尾空白和空行，避免排版差异导致缓存失效
+        lines = [line.strip() for line in prompt.strip().splitlines()]
+        normalized = "\n".join(line for line in lines if line)
+        raw = json.dumps([model, temperature, system_prompt, normalized], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def path(self):
+        return os.path.join(get_cache_dir(), self.filename)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        try:
+            for key, entry in stored:
+                if now - entry["created_at"] < self.ttl:
+                    self._entries[key] = {"content": entry["content"], "created_at": entry["created_at"]}
+        except (KeyError, TypeError, IndexError, ValueError) as e:
+            # 文件格式不符（如被其他版本写入），丢弃后从空缓存开始
+            print(f"⚠️ AI缓存文件格式无效，已忽略: {e}")
+            self._entries = OrderedDict()
+
+    def _save(self):
+        path = self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.items()), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 写入AI缓存失败: {e}")
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["created_at"] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["content"]
+
+    def put(self, key, content):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._load()
+            self._entries[key] = {"content": content, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._save()
+
+_response_cache = _ResponseCache(
+    "doubao_cache.json",
+    DOUBAO_CACHE_TTL,
+    DOUBAO_CACHE_SIZE
+)
+
+def _build_request(prompt, model, temperature, system_prompt):
+    """构建请求头和请求体"""
     headers = {
         "Authorization": f"Bearer {DOUBAO_API_KEY}",
         "Content-Type": "application/json"
@@ -19,17 +147,154 @@ def call_doubao_ai(prompt, model="doubao-seed-1-6-flash-250615", temperature=0.2
     data = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "你是一个专业的气象摘要助手，请将多条天气预警合并为简明、无重复的摘要，相同类型预警只保留一条。"},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ],
         "temperature": temperature
     }
+    return headers, data
+
+@stage("ai.doubao")
+def call_doubao_ai(prompt, model="doubao-seed-1-6-flash-250615", temperature=0.2, system_prompt=SYSTEM_PROMPT, expires_at=None):
+    """
+    调用火山引擎豆包大模型进行摘要/合成（相同输入直接返回缓存结果）
+    :param prompt: 输入的文本内容
+    :param model: 使用的模型名称
+    :param temperature: 采样温度
+    :param system_prompt: 系统提示词
+    :param expires_at: 截止时刻（time.monotonic），请求超时不超过剩余时间
+    :return: AI返回的摘要文本
+    """
+    cache_key = _ResponseCache.make_key(model, temperature, system_prompt, prompt)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        print("💾 AI摘要命中缓存")
+        incr("ai.cache_hit")
+        return cached
+
+    _rate_limiter.acquire()
+    timeout = DOUBAO_TIMEOUT
+    if expires_at is not None:
+        timeout = min(timeout, expires_at - time.monotonic())
+        if timeout <= 0:
+            raise TimeoutError("AI请求在截止时间前未能开始")
+    headers, data = _build_request(prompt, model, temperature, system_prompt)
+    started = time.perf_counter()
+    resp = None
     try:
-        resp = requests.post(DOUBAO_API_URL, headers=headers, json=data, timeout=20)
+        resp = get_http_client().post(DOUBAO_API_URL, headers=headers, json=data, timeout=timeout)
         resp.raise_for_status()
         result = resp.json()
-        return result["choices"][0]["message"]["content"]
+        content = result["choices"][0]["message"]["content"]
     except Exception as e:
+        record_request("doubao", time.perf_counter() - started, resp, error=True)
+        raise
+    record_request("doubao", time.perf_counter() - started, resp)
+    _response_cache.put(cache_key, content)
+    return content
+
+def call_doubao_ai_parallel(jobs, max_in_flight=None, deadline=None):
+    """
+    并发执行多个AI调用（受限速和截止时间约束）
+    :param jobs: {任务名: call_doubao_ai 的关键字参数}
+    :param max_in_flight: 最大同时请求数，默认读取 DOUBAO_MAX_IN_FLIGHT
+    :param deadline: 整体等待上限（秒），默认读取 DOUBAO_DEADLINE
+    :return: {任务名: AI返回文本或异常}，截止时间内未完成的任务为 TimeoutError
+    """
+    if not jobs:
+        return {}
+    max_in_flight = DOUBAO_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+    deadline = DOUBAO_DEADLINE if deadline is None else deadline
+
+    # 每个请求的超时不超过剩余的截止时间：超时未完成的工作线程不会被取消，
+    # 解释器退出时仍会等待它们，不能让单个请求拖过整体截止时间
+    expires_at = time.monotonic() + deadline if deadline > 0 else None
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(jobs))), thread_name_prefix="doubao")
+    futures = {executor.submit(call_doubao_ai, expires_at=expires_at, **kwargs): name for name, kwargs in jobs.items()}
+    done, not_done = wait(futures, timeout=deadline if deadline > 0 else None)
+    # 不等待超时的请求，交给调用方使用模板兜底
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for future, name in futures.items():
+        if future in not_done:
+            results[name] = TimeoutError(f"AI任务 {name} 超过 {deadline} 秒未完成")
+        elif future.exception() is not None:
+            results[name] = future.exception()
+        else:
+            results[name] = future.result()
+    if len(jobs) > 1 or not_done:
+        print(f"🤖 并发AI调用 {len(jobs)} 个任务：完成 {len(done)}，超时 {len(not_done)}")
+    return results
+
+@stage("ai.doubao")
+async def call_doubao_ai_async(prompt, model="doubao-seed-1-6-flash-250615", temperature=0.2, system_prompt=SYSTEM_PROMPT):
+    """
+    call_doubao_ai 的异步版本（复用共享的异步HTTP客户端）
+    :param prompt: 输入的文本内容
+    :param model: 使用的模型名称
+    :param temperature: 采样温度
+    :param system_prompt: 系统提示词
+    :return: AI返回的摘要文本
+    """
+    cache_key = _ResponseCache.make_key(model, temperature, system_prompt, prompt)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        print("💾 AI摘要命中缓存")
+        incr("ai.cache_hit")
+        return cached
+
+    await asyncio.to_thread(_rate_limiter.acquire)
+    headers, data = _build_request(prompt, model, temperature, system_prompt)
+    started = time.perf_counter()
+    resp = None
+    try:
+        resp = await get_async_http_client().post(DOUBAO_API_URL, headers=headers, json=data, timeout=DOUBAO_TIMEOUT)
+        resp.raise_for_status()
+        result = resp.json()
+        content = result["choices"][0]["message"]["content"]
+    except Exception:
+        record_request("doubao", time.perf_counter() - started, resp, error=True)
         raise
+    record_request("doubao", time.perf_counter() - started, resp)
+    _response_cache.put(cache_key, content)
+    return content
+
+
+async def call_doubao_ai_parallel_async(jobs, max_in_flight=None, deadline=None):
+    """
+    call_doubao_ai_parallel 的异步版本：各任务以 call_doubao_ai_async 并发执行
+    :param jobs: {任务名: call_doubao_ai_async 的关键字参数}
+    :param max_in_flight: 最大同时请求数，默认读取 DOUBAO_MAX_IN_FLIGHT
+    :param deadline: 整体等待上限（秒），默认读取 DOUBAO_DEADLINE
+    :return: {任务名: AI返回文本或异常}，截止时间内未完成的任务取消并记为 TimeoutError
+    """
+    if not jobs:
+        return {}
+    max_in_flight = DOUBAO_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+    deadline = DOUBAO_DEADLINE if deadline is None else deadline
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+    async def run(kwargs):
+        async with semaphore:
+            return await call_doubao_ai_async(**kwargs)
+
+    tasks = {asyncio.create_task(run(kwargs)): name for name, kwargs in jobs.items()}
+    done, not_done = await asyncio.wait(tasks, timeout=deadline if deadline > 0 else None)
+    # 不等待超时的请求，交给调用方使用模板兜底
+    for task in not_done:
+        task.cancel()
+
+    results = {}
+    for task, name in tasks.items():
+        if task in not_done:
+            results[name] = TimeoutError(f"AI任务 {name} 超过 {deadline} 秒未完成")
+        elif task.exception() is not None:
+            results[name] = task.exception()
+        else:
+            results[name] = task.result()
+    if len(jobs) > 1 or not_done:
+        print(f"🤖 异步并发AI调用 {len(jobs)} 个任务：完成 {len(done)}，超时 {len(not_done)}")
+    return results
 
 # 模块功能：调用豆包AI进行天气预警摘要
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP持久化缓存模块
+按数据集TTL缓存CWA响应到本地磁盘，过期后使用 ETag / Last-Modified 条件请求重新验证
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from .city_config import get_cache_dir
+
+# 是否启用磁盘缓存（设为0关闭）
+HTTP_CACHE_ENABLED = os.getenv("CWA_HTTP_CACHE", "1") != "0"
+
+# 各数据集的缓存有效期（秒），有效期内直接使用本地副本
+DATASET_TTL = {
+    "C-B0025-001": 24 * 3600,  # 气候统计，每日更新
+    "F-C0032-001": 30 * 60,    # 县市36小时预报
+    "F-D0047": 60 * 60,        # 乡镇预报（前缀匹配）
+    "W-C0034-005": 10 * 60,    # 台风路径
+    "W-C0033-001": 5 * 60,     # 地区预警
+    "W-C0033-002": 5 * 60,     # 天气特报
+    "O-A0001-001": 5 * 60,     # 自动气象站
+    "O-A0002-001": 5 * 60,     # 自动雨量站
+    "O-A0003-001": 5 * 60,     # 局属气象站
+    "E-A0015-001": 60,         # 有感地震
+    "E-A0016-001": 60          # 小区域地震
+}
+
+# 未配置的数据集每次都重新验证
+DEFAULT_TTL = 0
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def dataset_ttl(dataset_id):
+    """查询数据集的缓存有效期"""
+    if dataset_id in DATASET_TTL:
+        return DATASET_TTL[dataset_id]
+    for prefix, ttl in DATASET_TTL.items():
+        if dataset_id.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def record_hit():
+    """记录一次本地命中（未发起请求）"""
+    _record("hit")
+
+def record_revalidated():
+    """记录一次条件请求命中（304）"""
+    _record("revalidated")
+
+def record_miss():
+    """记录一次完整下载"""
+    _record("miss")
+
+def reset_stats():
+    """重置本次运行的命中统计"""
+    with _stats_lock:
+        _stats.clear()
+
+def get_stats():
+    """获取本次运行的命中统计"""
+    with _stats_lock:
+        return {
+            "hit": _stats["hit"],
+            "revalidated": _stats["revalidated"],
+            "miss": _stats["miss"]
+        }
+
+def format_stats():
+    """格式化命中统计，用于运行结束时输出"""
+    stats = get_stats()
+    return f"📦 HTTP缓存：命中 {stats['hit']}，304重新验证 {stats['revalidated']}，下载 {stats['miss']}"
+
+class CachedResponse:
+    """磁盘上的一条缓存响应"""
+
+    __slots__ = ("dataset_id", "body_path", "meta_path", "meta")
+
+    def __init__(self, dataset_id, body_path, meta_path, meta):
+        self.dataset_id = dataset_id
+        self.body_path = body_path
+        self.meta_path = meta_path
+        self.meta = meta
+
+    def is_fresh(self, now=None):
+        """是否仍在TTL有效期内"""
+        now = time.time() if now is None else now
+        return now - self.meta.get("stored_at", 0) < dataset_ttl(self.dataset_id)
+
+    def conditional_headers(self):
+        """条件请求头"""
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+    def read(self):
+        """读取缓存的响应体"""
+        with open(self.body_path, "rb") as f:
+            return f.read()
+
+    def touch(self):
+        """服务器确认未变化（304）后刷新存储时间；写入失败只影响下次是否重新验证，不影响本次结果"""
+        self.meta["stored_at"] = time.time()
+        try:
+            _write_atomic(self.meta_path, json.dumps(self.meta, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️ 刷新HTTP缓存时间失败 {self.dataset_id}: {e}")
+
+def _cache_paths(dataset_id, params):
+    """缓存文件路径：数据集ID + 参数摘要"""
+    digest = hashlib.sha1(
+        json.dumps(sorted(params.items()), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:12]
+    base = os.path.join(get_cache_dir("http"), f"{dataset_id}-{digest}")
+    return base + ".body", base + ".json"
+
+def _write_atomic(path, content):
+    """先写临时文件再替换，避免并发读到半个文件"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def load(dataset_id, params):
+    """读取缓存条目，不存在或已损坏时返回 None"""
+    if not HTTP_CACHE_ENABLED:
+        return None
+    body_path, meta_path = _cache_paths(dataset_id, params)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(body_path):
+        return None
+    return CachedResponse(dataset_id, body_path, meta_path, meta)
+
+def store(dataset_id, params, content, headers):
+    """保存响应到磁盘缓存"""
+    if not HTTP_CACHE_ENABLED:
+        return
+    body_path, meta_path = _cache_paths(dataset_id, params)
+    meta = {
+        "dataset_id": dataset_id,
+        "params": params,
+        "etag": headers.get("ETag", ""),
+        "last_modified": headers.get("Last-Modified", ""),
+        "stored_at": time.time()
+    }
+    try:
+        _write_atomic(body_path, content)
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    except OSError as e:
+        print(f"⚠️ 写入HTTP缓存失败 {dataset_id}: {e}")
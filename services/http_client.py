@@ -2,32 +2,51 @@
 # -*- coding: utf-8 -*-
 """
 网络请求客户端模块
-提供robust session和safe request功能
+提供进程级共享的连接池客户端和safe request功能（含异步版本）
 """
 
+import asyncio
+import os
+import threading
+import time
 import requests
-import ssl
 import urllib3
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from .metrics import record_request, request_label
+
+try:
+    import httpx  # 仅异步模式需要
+except ImportError:
+    httpx = None
 
 # 禁用SSL警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def create_robust_session():
-    """创建一个具有重试机制和SSL配置的requests session"""
+# 连接池大小（可通过环境变量调整）
+DEFAULT_POOL_SIZE = int(os.getenv("CWA_HTTP_POOL_SIZE", "10"))
+
+# 需要重试的HTTP状态码
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+def create_robust_session(pool_size=DEFAULT_POOL_SIZE):
+    """创建一个具有重试机制、连接池和SSL配置的requests session"""
     session = requests.Session()
     
     # 配置重试策略
     retry_strategy = Retry(
         total=3,  # 总重试次数
         backoff_factor=1,  # 重试间隔
-        status_forcelist=[429, 500, 502, 503, 504],  # 需要重试的HTTP状态码
+        status_forcelist=RETRY_STATUS_CODES,  # 需要重试的HTTP状态码
         allowed_methods=["HEAD", "GET", "OPTIONS"]  # 允许重试的HTTP方法
     )
     
-    # 创建适配器
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    # 创建适配器（keep-alive连接池，同一主机复用TCP+TLS连接）
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     
@@ -36,43 +55,228 @@ def create_robust_session():
     
     return session
 
-def safe_request(url, params=None, timeout=15, max_retries=2):
+class HttpClient:
+    """
+    共享HTTP客户端
+    持有一个带连接池的session，支持 with 语句和显式 close()
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """懒加载session，关闭后再次使用会重新创建"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = create_robust_session(self.pool_size)
+        return self._session
+
+    def get(self, url, params=None, timeout=15, verify=True, headers=None):
+        """发送GET请求（复用连接池）"""
+        return self.session.get(url, params=params, timeout=timeout, verify=verify, headers=headers)
+
+    def post(self, url, json=None, headers=None, timeout=15):
+        """发送POST请求（复用连接池）"""
+        return self.session.post(url, json=json, headers=headers, timeout=timeout)
+
+    def close(self):
+        """关闭session并释放连接池"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """获取进程级共享的HTTP客户端"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+def close_http_client():
+    """关闭进程级共享的HTTP客户端"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+def safe_request(url, params=None, timeout=15, max_retries=2, client=None, headers=None, label=None):
     """安全的HTTP请求，带有SSL错误处理和重试机制"""
-    session = create_robust_session()
+    client = client or get_http_client()
     
-    for attempt in range(max_retries + 1):
-        try:
-            response = session.get(url, params=params, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.SSLError as e:
-            print(f"⚠️ SSL错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
-            if attempt == max_retries:
-                # 最后一次尝试：禁用SSL验证
-                print("🔓 最后尝试：禁用SSL验证...")
-                session.verify = False
-                try:
-                    response = session.get(url, params=params, timeout=timeout)
+    started = time.perf_counter()
+    attempt = 0
+    response = None
+    failed = True
+    try:
+        for attempt in range(max_retries + 1):
+            try:
+                response = client.get(url, params=params, timeout=timeout, headers=headers)
+                response.raise_for_status()
+                failed = False
+                return response
+            except requests.exceptions.SSLError as e:
+                print(f"⚠️ SSL错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    # 最后一次尝试：仅对本次请求禁用SSL验证，不影响共享session
+                    print("🔓 最后尝试：禁用SSL验证...")
+                    try:
+                        response = client.get(url, params=params, timeout=timeout, verify=False, headers=headers)
+                        response.raise_for_status()
+                        failed = False
+                        return response
+                    except Exception as final_e:
+                        raise Exception(f"所有重试均失败，最后错误: {final_e}")
+            except requests.exceptions.Timeout as e:
+                print(f"⏰ 请求超时 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    raise
+            except requests.exceptions.ConnectionError as e:
+                print(f"🔌 连接错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    raise
+            except Exception as e:
+                print(f"❌ 未知错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    raise
+        
+            # 重试前等待
+            if attempt < max_retries:
+                time.sleep(2 ** attempt)  # 指数退避
+    finally:
+        # 记录本次请求（含重试）的耗时、字节数和重试次数
+        record_request(label or request_label(url), time.perf_counter() - started, response, retries=attempt, error=failed)
+
+def _require_httpx():
+    if httpx is None:
+        raise ImportError("异步模式需要安装 httpx：pip install httpx")
+
+class AsyncHttpClient:
+    """
+    共享异步HTTP客户端（基于httpx）
+    持有一个带连接池的AsyncClient，支持 async with 语句和显式 aclose()
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        _require_httpx()
+        self.pool_size = pool_size
+        self._client = None
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+
+    @property
+    def client(self):
+        """懒加载AsyncClient，关闭后再次使用会重新创建"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self._limits(), verify=True)
+        return self._client
+
+    async def get(self, url, params=None, timeout=15, verify=True, headers=None):
+        """发送GET请求（复用连接池）"""
+        if verify:
+            return await self.client.get(url, params=params, timeout=timeout, headers=headers)
+        # httpx 的SSL验证是客户端级别的，禁用验证时使用一次性客户端
+        async with httpx.AsyncClient(verify=False) as insecure_client:
+            return await insecure_client.get(url, params=params, timeout=timeout, headers=headers)
+
+    async def post(self, url, json=None, headers=None, timeout=15):
+        """发送POST请求（复用连接池）"""
+        return await self.client.post(url, json=json, headers=headers, timeout=timeout)
+
+    async def aclose(self):
+        """关闭AsyncClient并释放连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+_async_client = None
+
+def get_async_http_client():
+    """获取共享的异步HTTP客户端（需在同一个事件循环内使用）"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncHttpClient()
+    return _async_client
+
+async def close_async_http_client():
+    """关闭共享的异步HTTP客户端"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+async def async_safe_request(url, params=None, timeout=15, max_retries=2, client=None, headers=None, label=None):
+    """safe_request 的异步版本：重试等待使用 asyncio.sleep，不阻塞事件循环"""
+    client = client or get_async_http_client()
+    
+    started = time.perf_counter()
+    attempt = 0
+    response = None
+    failed = True
+    try:
+        for attempt in range(max_retries + 1):
+            try:
+                response = await client.get(url, params=params, timeout=timeout, headers=headers)
+                if response.status_code == 304:
+                    # 条件请求命中，与 requests 的行为保持一致，不视为错误
+                    failed = False
+                    return response
+                if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                    print(f"⚠️ HTTP {response.status_code} (尝试 {attempt + 1}/{max_retries + 1})")
+                else:
                     response.raise_for_status()
+                    failed = False
                     return response
-                except Exception as final_e:
-                    raise Exception(f"所有重试均失败，最后错误: {final_e}")
-        except requests.exceptions.Timeout as e:
-            print(f"⏰ 请求超时 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
-            if attempt == max_retries:
-                raise
-        except requests.exceptions.ConnectionError as e:
-            print(f"🔌 连接错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
-            if attempt == max_retries:
-                raise
-        except Exception as e:
-            print(f"❌ 未知错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
-            if attempt == max_retries:
-                raise
+            except httpx.ConnectError as e:
+                # httpx 将SSL握手失败归为连接错误
+                print(f"🔌 连接错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    if "SSL" not in str(e) and "CERTIFICATE" not in str(e):
+                        raise
+                    # 最后一次尝试：仅对本次请求禁用SSL验证
+                    print("🔓 最后尝试：禁用SSL验证...")
+                    try:
+                        response = await client.get(url, params=params, timeout=timeout, verify=False, headers=headers)
+                        response.raise_for_status()
+                        failed = False
+                        return response
+                    except Exception as final_e:
+                        raise Exception(f"所有重试均失败，最后错误: {final_e}")
+            except httpx.TimeoutException as e:
+                print(f"⏰ 请求超时 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    raise
+            except Exception as e:
+                print(f"❌ 未知错误 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                if attempt == max_retries:
+                    raise
         
-        # 重试前等待
-        if attempt < max_retries:
-            import time
-            time.sleep(2 ** attempt)  # 指数退避
-    
-    session.close() 
\ No newline at end of file
+            # 重试前等待
+            if attempt < max_retries:
+                await asyncio.sleep(2 ** attempt)  # 指数退避
+    finally:
+        # 记录本次请求（含重试）的耗时、字节数和重试次数
+        record_request(label or request_label(url), time.perf_counter() - started, response, retries=attempt, error=failed)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词匹配模块
+Aho–Corasick 多模式匹配，一次扫描文本即可找出所有关键词，供各获取模块对天气现象等文本分类
+"""
+
+from collections import deque
+
+class KeywordMatcher:
+    """
+    预编译的多关键词匹配器
+    :param patterns: 关键词列表，元素为关键词字符串或 (关键词, 值)；列表顺序即优先级
+    """
+
+    __slots__ = ("_patterns", "_goto", "_fail", "_output")
+
+    def __init__(self, patterns):
+        self._patterns = [(p, p) if isinstance(p, str) else tuple(p) for p in patterns]
+        self._goto = [{}]
+        self._output = [[]]
+
+        # 构建关键词前缀树
+        for index, (keyword, _) in enumerate(self._patterns):
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(index)
+
+        # 广度优先计算失败指针，并合并后缀关键词的输出
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if state:
+                    self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _occurrences(self, text):
+        """逐个产出命中位置：(起始下标, 结束下标, 关键词序号)"""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield end - len(patterns[index][0]), end, index
+
+    def search(self, text):
+        """文本中是否包含任一关键词"""
+        if not text:
+            return False
+        return next(self._occurrences(text), None) is not None
+
+    def keywords_in(self, text):
+        """文本中出现的全部关键词（含被更长关键词包含的，等价于逐个 keyword in text）"""
+        if not text:
+            return set()
+        return {self._patterns[index][0] for _, _, index in self._occurrences(text)}
+
+    def classify(self, text):
+        """
+        文本命中的 (关键词, 值) 列表，按优先级排序
+        被更长关键词覆盖的命中不计入，如「大雷雨」只命中大雷雨而不命中雷雨
+        """
+        if not text:
+            return []
+        occurrences = list(self._occurrences(text))
+        matched = set()
+        for start, end, index in occurrences:
+            covered = any(
+                other_start <= start and end <= other_end and other_end - other_start > end - start
+                for other_start, other_end, _ in occurrences
+            )
+            if not covered:
+                matched.add(index)
+
+        result = []
+        seen = set()
+        for index in sorted(matched):
+            keyword, value = self._patterns[index]
+            if keyword not in seen:
+                seen.add(keyword)
+                result.append((keyword, value))
+        return result
+
+    def first(self, text):
+        """优先级最高的命中 (关键词, 值)，没有命中时返回 None"""
+        matches = self.classify(text)
+        return matches[0] if matches else None
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标模块
+记录各阶段耗时、各数据集的请求耗时/字节数/重试次数/缓存命中，运行结束时输出
+JSON Lines 运行报告（可选 Prometheus textfile），便于对性能退化告警
+"""
+
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from .city_config import get_cache_dir
+
+# 是否记录运行指标（设为0关闭）
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+
+# 运行报告路径（JSON Lines，每次运行追加一行），默认 <缓存目录>/metrics.jsonl
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+
+# Prometheus textfile 路径（供 node_exporter textfile collector 读取），为空不输出
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", "")
+
+# Prometheus 指标名前缀
+PROM_PREFIX = "tw_weather"
+
+class RunMetrics:
+    """一次运行的指标"""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "errors": 0})
+        self.requests = defaultdict(lambda: {"requests": 0, "errors": 0, "retries": 0, "bytes": 0,
+                                             "seconds": 0.0, "wait_seconds": 0.0})
+        self.cache = defaultdict(Counter)
+        self.counters = Counter()
+
+    def add_stage(self, name, seconds, error=False):
+        with self._lock:
+            stage = self.stages[name]
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["errors"] += int(error)
+
+    def add_request(self, label, seconds, nbytes, retries, error, wait_seconds):
+        with self._lock:
+            request = self.requests[label]
+            request["requests"] += 1
+            request["errors"] += int(error)
+            request["retries"] += retries
+            request["bytes"] += nbytes
+            request["seconds"] += seconds
+            request["wait_seconds"] += wait_seconds
+
+    def add_cache(self, label, outcome):
+        with self._lock:
+            self.cache[label][outcome] += 1
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def to_dict(self, **extra):
+        """运行报告（JSON 原生类型）"""
+        with self._lock:
+            report = {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "duration": round(time.perf_counter() - self._started, 4),
+                "stages": {name: dict(stage, seconds=round(stage["seconds"], 4)) for name, stage in sorted(self.stages.items())},
+                "requests": {
+                    label: dict(request, seconds=round(request["seconds"], 4), wait_seconds=round(request["wait_seconds"], 4))
+                    for label, request in sorted(self.requests.items())
+                },
+                "cache": {label: dict(outcomes) for label, outcomes in sorted(self.cache.items())},
+                "counters": dict(sorted(self.counters.items()))
+            }
+        report.update(extra)
+        return report
+
+_current = RunMetrics()
+
+def current():
+    """当前运行的指标"""
+    return _current
+
+def reset_metrics():
+    """开始新一次运行的指标记录"""
+    global _current
+    _current = RunMetrics()
+    return _current
+
+def record_stage(name, seconds, error=False):
+    if METRICS_ENABLED:
+        _current.add_stage(name, seconds, error)
+
+def request_label(url):
+    """请求的指标标签：只取主机名（路径中可能包含推送Key等敏感信息）"""
+    return urlsplit(url).netloc or url
+
+def record_request(label, seconds, response=None, retries=0, error=False):
+    """
+    记录一次HTTP请求（含重试）
+    :param response: 最终响应，用于统计字节数和服务器响应时间（收到响应头的耗时）
+    """
+    if not METRICS_ENABLED:
+        return
+    nbytes = 0
+    wait_seconds = 0.0
+    if response is not None:
+        content = getattr(response, "content", None)
+        nbytes = len(content) if isinstance(content, (bytes, bytearray)) else 0
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None:
+            wait_seconds = elapsed.total_seconds()
+    _current.add_request(label, seconds, nbytes, retries, error, wait_seconds)
+
+def record_cache(label, outcome):
+    """记录一次缓存结果（hit / revalidated / miss）"""
+    if METRICS_ENABLED:
+        _current.add_cache(label, outcome)
+
+def incr(name, amount=1):
+    """累加计数器"""
+    if METRICS_ENABLED:
+        _current.incr(name, amount)
+
+class stage:
+    """
+    统计一个阶段的耗时，可作为上下文管理器或装饰器（支持异步函数）使用
+        with stage("summary"): ...
+        @stage("rss.write")
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record_stage(self.name, time.perf_counter() - self._started, error=exc_type is not None)
+        return False
+
+    def __call__(self, func):
+        name = self.name
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+class Laps:
+    """
+    顺序执行的多个分段计时：每次 lap 记录距上一次 lap 的耗时
+    适用于不便整体缩进的长函数（如预警获取的各个数据段）
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        record_stage(f"{self.prefix}.{name}", now - self._last)
+        self._last = now
+
+def _prom_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_prometheus(report):
+    """把运行报告转换为 Prometheus 文本格式"""
+    lines = []
+
+    def metric(name, help_text, metric_type, samples):
+        lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROM_PREFIX}_{name} {metric_type}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_prom_label(val)}"' for key, val in labels.items())
+            lines.append(f"{PROM_PREFIX}_{name}{{{label_text}}} {value}" if label_text else f"{PROM_PREFIX}_{name} {value}")
+
+    stages = report["stages"].items()
+    requests = report["requests"].items()
+    metric("run_duration_seconds", "Wall time of the last run", "gauge", [({}, report["duration"])])
+    metric("run_timestamp_seconds", "Unix time when the last run finished", "gauge", [({}, int(time.time()))])
+    metric("stage_seconds", "Wall time per stage", "gauge", [({"stage": n}, s["seconds"]) for n, s in stages])
+    metric("stage_calls", "Calls per stage", "gauge", [({"stage": n}, s["calls"]) for n, s in stages])
+    metric("stage_errors", "Failed calls per stage", "gauge", [({"stage": n}, s["errors"]) for n, s in stages])
+    metric("request_seconds", "HTTP wall time including retries", "gauge", [({"target": n}, r["seconds"]) for n, r in requests])
+    metric("request_wait_seconds", "Time until response headers", "gauge", [({"target": n}, r["wait_seconds"]) for n, r in requests])
+    metric("request_bytes", "Response bytes received", "gauge", [({"target": n}, r["bytes"]) for n, r in requests])
+    metric("request_retries", "HTTP retries", "gauge", [({"target": n}, r["retries"]) for n, r in requests])
+    metric("request_errors", "Failed HTTP requests", "gauge", [({"target": n}, r["errors"]) for n, r in requests])
+    metric("cache_results", "Cache results by outcome", "gauge",
+           [({"target": n, "outcome": o}, c) for n, outcomes in report["cache"].items() for o, c in sorted(outcomes.items())])
+    metric("counter", "Miscellaneous counters", "gauge", [({"name": n}, c) for n, c in report["counters"].items()])
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_report(path=None, prom_path=None, **extra):
+    """
+    输出本次运行的报告：追加一行到 JSON Lines 文件，配置了 METRICS_PROM_PATH 时同时写 Prometheus textfile
+    :param extra: 附加到报告中的字段（如运行模式、是否成功）
+    :return: 报告字典；未启用时为 None
+    """
+    if not METRICS_ENABLED:
+        return None
+    report = _current.to_dict(**extra)
+    path = path or METRICS_PATH or os.path.join(get_cache_dir(), "metrics.jsonl")
+    prom_path = prom_path or METRICS_PROM_PATH
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        if prom_path:
+            _write_atomic(prom_path, format_prometheus(report))
+    except OSError as e:
+        print(f"⚠️ 写入运行指标失败: {e}")
+    print(format_summary(report))
+    return report
+
+def format_summary(report):
+    """一行运行摘要：总耗时和耗时最多的阶段"""
+    top = sorted(report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)[:4]
+    parts = "，".join(f"{name} {stage['seconds']:.2f}s" for name, stage in top)
+    received = sum(request["bytes"] for request in report["requests"].values())
+    return f"⏱️ 运行耗时 {report['duration']:.2f}s（{parts}），接收 {received / 1024:.1f} KB"
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据模型模块
+预报时段、测站观测、预警和台风定位的类型化结构；接口中的数值在解析时转换一次，
+后续各阶段直接使用数值，不再重复做字符串 → 数字的转换
+"""
+
+import functools
+import math
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# Python 3.10 起 dataclass 支持 slots，每条记录不再带 __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_TAIPEI = ZoneInfo("Asia/Taipei")
+
+def parse_int(value, strict=False):
+    """
+    接口数值转为整数（"31"、"31.0"、31 均可），空值或无法解析时为 None
+    strict=True 时按 int() 解析，"45.5" 这类小数字符串视为无法解析
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if strict:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        number = parse_float(value)
+        return round(number) if number is not None else None
+
+def parse_float(value):
+    """接口数值转为浮点数，空值、无法解析或非有限值时为 None"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+@functools.lru_cache(maxsize=4096)
+def normalize_time(value):
+    """
+    预报时间统一为台北时间 "YYYY-MM-DD HH:MM:SS"，作为时段索引的键
+    县市预报为 "2025-07-30 12:00:00"，乡镇预报为 "2025-07-30T12:00:00+08:00"
+    """
+    if not value:
+        return ""
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return str(value).replace("T", " ").split("+")[0]
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(_TAIPEI).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+def format_number(value):
+    """数值转为展示文本，None 为空字符串"""
+    return "" if value is None else str(value)
+
+@dataclass(**_DATACLASS_OPTIONS)
+class ForecastPeriod:
+    """一个预报时段（fx_time 为时段开始时间）"""
+    fx_time: str
+    text: str = ""
+    icon: str = ""
+    temp: Optional[int] = None          # 代表温度（36小时预报中取最高温度近似）
+    temp_max: Optional[int] = None
+    temp_min: Optional[int] = None
+    precip: Optional[int] = None        # 降雨机率（%）
+
+@dataclass(**_DATACLASS_OPTIONS)
+class DistrictForecast:
+    """
+    一个乡镇区的预报：periods 为按时间排序的逐3小时序列
+    current 取各要素各自的第一个时段（最新数据），description 为第一个时段的综合描述
+    """
+    district: str
+    periods: list = field(default_factory=list)
+    current: Optional[ForecastPeriod] = None
+    description: str = ""
+
+@dataclass(**_DATACLASS_OPTIONS)
+class DailyForecast:
+    """一天的预报概况"""
+    fx_date: str
+    text_day: str = ""
+    text_night: str = ""
+    temp_max: Optional[int] = None
+    temp_min: Optional[int] = None
+    precip: Optional[int] = None
+
+@dataclass(**_DATACLASS_OPTIONS)
+class StationObservation:
+    """测站的一项异常观测（供AI辅助判断）"""
+    station: str
+    station_id: str
+    value: float
+    unit: str
+    kind: str = ""                      # 观测类别，如 高温、低温
+    obs_time: str = ""
+
+@dataclass(**_DATACLASS_OPTIONS)
+class TyphoonFix:
+    """热带气旋的一次定位"""
+    fix_time: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    max_wind_speed: Optional[int] = None    # 近中心最大风速（m/s）
+    max_gust_speed: Optional[int] = None
+    pressure: Optional[int] = None          # 中心气压（百帕）
+    moving_speed: Optional[int] = None
+    moving_direction: str = ""
+
+    @classmethod
+    def from_api(cls, fix):
+        """由 W-C0034-005 的 fix 记录构建（coordinate 为 "经度,纬度"）"""
+        longitude = latitude = None
+        parts = str(fix.get("coordinate", "")).split(",")
+        if len(parts) == 2:
+            longitude, latitude = parse_float(parts[0]), parse_float(parts[1])
+        return cls(
+            fix_time=fix.get("fixTime", ""),
+            latitude=latitude,
+            longitude=longitude,
+            max_wind_speed=parse_int(fix.get("maxWindSpeed"), strict=True),
+            max_gust_speed=parse_int(fix.get("maxGustSpeed")),
+            pressure=parse_int(fix.get("pressure")),
+            moving_speed=parse_int(fix.get("movingSpeed")),
+            moving_direction=fix.get("movingDirection", "")
+        )
+
+@dataclass(**_DATACLASS_OPTIONS)
+class WeatherWarning:
+    """
+    一条预警；通用字段之外，各来源只填写与其相关的字段
+    id 在加入预警集合时生成，status / first_seen 由预警生命周期存储标注
+    """
+    title: str
+    text: str
+    city: str
+    type: str
+    source: str
+    id: str = ""
+    # 地区预警 / 天气特报
+    phenomena: str = ""
+    significance: str = ""
+    start_time: str = ""
+    end_time: str = ""
+    issue_time: str = ""
+    update_time: str = ""
+    # 地震
+    earthquake_no: Optional[int] = None
+    origin_time: str = ""
+    magnitude: Optional[float] = None
+    depth: Optional[float] = None
+    # 观测（value 为触发预警的温度、风速或雨量）
+    station_id: str = ""
+    obs_time: str = ""
+    value: Optional[float] = None
+    # 台风
+    typhoon_name: str = ""
+    scale: str = ""
+    fix: Optional[TyphoonFix] = None
+    # 生命周期
+    status: str = ""
+    first_seen: str = ""
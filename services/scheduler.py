@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻调度模块
+各数据集按各自的更新频率轮询，最新结果保存在共享状态中；只有输入内容变化时才重新生成摘要和推送
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .cwa_datastore import dataset_key, dataset_run, preload_datasets, revalidate_dataset_entry
+from .metrics import reset_metrics, write_report
+
+# 各数据集的轮询间隔（秒），支持前缀匹配
+DATASET_INTERVALS = {
+    "E-A0015-001": 60,         # 有感地震
+    "E-A0016-001": 60,         # 小区域地震
+    "W-C0033-001": 5 * 60,     # 地区预警
+    "W-C0033-002": 5 * 60,     # 天气特报
+    "O-A0002-001": 10 * 60,    # 自动雨量站
+    "O-A0003-001": 10 * 60,    # 局属气象站
+    "W-C0034-005": 10 * 60,    # 台风路径
+    "F-C0032-001": 30 * 60,    # 县市36小时预报
+    "F-D0047": 60 * 60,        # 乡镇预报（前缀匹配）
+    "C-B0025-001": 24 * 3600   # 气候统计
+}
+
+# 未配置的数据集默认轮询间隔（秒）
+DEFAULT_INTERVAL = int(os.getenv("DAEMON_DEFAULT_INTERVAL", "600"))
+
+# 获取失败后的重试间隔上限（秒）
+RETRY_INTERVAL = int(os.getenv("DAEMON_RETRY_INTERVAL", "60"))
+
+# 同时轮询的最大数据集数
+POLL_WORKERS = int(os.getenv("CWA_FETCH_WORKERS", "8"))
+
+def dataset_interval(dataset_id):
+    """查询数据集的轮询间隔"""
+    if dataset_id in DATASET_INTERVALS:
+        return DATASET_INTERVALS[dataset_id]
+    for prefix, interval in DATASET_INTERVALS.items():
+        if dataset_id.startswith(prefix):
+            return interval
+    return DEFAULT_INTERVAL
+
+class _Source:
+    """一个被轮询的数据集：最近一次的响应、内容摘要和下次轮询时间"""
+
+    __slots__ = ("dataset_id", "params", "timeout", "interval", "entry", "digest", "due")
+
+    def __init__(self, dataset_id, params, timeout, interval):
+        self.dataset_id = dataset_id
+        self.params = params
+        self.timeout = timeout
+        self.interval = interval
+        self.entry = None
+        self.digest = None
+        self.due = 0.0
+
+class DatasetScheduler:
+    """
+    按数据集分别调度的轮询器
+    :param datasets: [(数据集ID, 参数, 超时秒数), ...]，与 prefetch_datasets 的格式相同
+    """
+
+    def __init__(self, datasets, max_workers=None):
+        self.max_workers = POLL_WORKERS if max_workers is None else max(1, max_workers)
+        self.last_errors = 0
+        self._sources = {}
+        for dataset_id, params, timeout in datasets:
+            key = dataset_key(dataset_id, params)
+            if key not in self._sources:
+                self._sources[key] = _Source(dataset_id, params, timeout, dataset_interval(dataset_id))
+
+    def __len__(self):
+        return len(self._sources)
+
+    def next_due(self):
+        """最近一个数据集的轮询时间（time.monotonic）"""
+        return min((source.due for source in self._sources.values()), default=time.monotonic())
+
+    def _poll_one(self, source):
+        # 轮询间隔与磁盘缓存TTL相同，不能使用TTL内的本地副本，否则每隔一次轮询都拿到旧内容
+        return revalidate_dataset_entry(source.dataset_id, timeout=source.timeout, **source.params)
+
+    def poll(self, now=None):
+        """
+        轮询所有到期的数据集
+        :return: 内容发生变化的数据集ID列表（首次获取也算变化）
+        """
+        now = time.monotonic() if now is None else now
+        due = [source for source in self._sources.values() if source.due <= now]
+        self.last_errors = 0
+        if not due:
+            return []
+
+        changed = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due)), thread_name_prefix="cwa-poll") as executor:
+            futures = [(source, executor.submit(self._poll_one, source)) for source in due]
+            for source, future in futures:
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # 保留上一次的结果，稍后重试
+                    print(f"⚠️ 轮询 {source.dataset_id} 失败: {e}")
+                    self.last_errors += 1
+                    source.due = now + min(source.interval, RETRY_INTERVAL)
+                    continue
+                source.due = now + source.interval
+                digest = hashlib.sha1(entry.content).hexdigest()
+                if digest != source.digest:
+                    source.entry = entry
+                    source.digest = digest
+                    changed.append(source.dataset_id)
+        return changed
+
+    def preload(self):
+        """把各数据集最近一次的结果放入当前运行的缓存"""
+        preload_datasets([source.entry for source in self._sources.values() if source.entry is not None])
+
+def run_daemon(datasets, build, publish, on_error=None, max_workers=None):
+    """
+    常驻运行：轮询到期数据集，有变化时重新构建并发布
+    每次重新构建（或轮询出错）后输出一次运行指标，未变化的轮询不单独报告
+    :param datasets: 需要轮询的数据集列表
+    :param build: 构建结果的函数，在已预载共享状态的 dataset_run() 内调用
+    :param publish: 发布结果的函数，参数为 build 的返回值
+    :param on_error: 构建或发布失败时的回调，参数为异常；失败不会终止常驻进程
+    """
+    scheduler = DatasetScheduler(datasets, max_workers=max_workers)
+    print(f"🕒 常驻模式启动，轮询 {len(scheduler)} 个数据集")
+    while True:
+        reset_metrics()
+        changed = scheduler.poll()
+        ok = True
+        if changed:
+            print(f"🔄 数据更新：{', '.join(sorted(set(changed)))}")
+            try:
+                with dataset_run():
+                    scheduler.preload()
+                    result = build()
+                publish(result)
+            except Exception as e:
+                ok = False
+                if on_error is not None:
+                    on_error(e)
+                else:
+                    print(f"❌ 重新生成失败：{e}")
+        if changed or scheduler.last_errors:
+            write_report(mode="daemon", ok=ok, changed=sorted(set(changed)), poll_errors=scheduler.last_errors)
+        time.sleep(max(0.0, scheduler.next_due() - time.monotonic()))
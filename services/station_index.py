@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测站归属索引模块
+根据测站元数据（县市、乡镇、经纬度）把测站映射到 CITIES 中的城市，结果持久化到本地缓存
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from .city_config import CITIES, get_cache_dir
+
+# 按距离匹配的默认半径（公里，设为0只按县市匹配）；城市配置中的 radius_km 优先
+STATION_MATCH_RADIUS_KM = float(os.getenv("STATION_MATCH_RADIUS_KM", "0"))
+
+# 索引格式版本，匹配规则变化时递增
+INDEX_VERSION = 1
+
+EARTH_RADIUS_KM = 6371.0
+
+def _normalize(name):
+    """统一「台/臺」写法"""
+    return (name or "").replace("台", "臺")
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    """两点间球面距离（公里）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def _station_meta(county, town, latitude, longitude):
+    """测站元数据（用于判断缓存的归属是否仍然有效）"""
+    def coordinate(value):
+        return None if math.isnan(value) else round(value, 5)
+    return [county, town, coordinate(latitude), coordinate(longitude)]
+
+class StationCityIndex:
+    """
+    测站 → 城市 归属索引
+    测站所在县市与城市的 cwa_id 相同即归属该城市；配置了中心点和半径时，半径内的测站同样归属
+    """
+
+    def __init__(self, cities, filename="station_index.json"):
+        self.cities = cities
+        self.filename = filename
+        self._digest = self._config_digest(cities)
+        self._stations = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config_digest(cities):
+        config = [
+            (city, _normalize(c["cwa_id"]), c.get("center"), c.get("radius_km", STATION_MATCH_RADIUS_KM))
+            for city, c in cities.items()
+        ]
+        raw = json.dumps([INDEX_VERSION, config], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def path(self):
+        return os.path.join(get_cache_dir(), self.filename)
+
+    def _load(self):
+        if self._stations is not None:
+            return
+        self._stations = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        # 城市配置或匹配规则变化后全部重建
+        if stored.get("config") == self._digest:
+            self._stations = stored.get("stations", {})
+
+    def _save(self):
+        path = self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"config": self._digest, "stations": self._stations}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 写入测站索引失败: {e}")
+
+    def _match(self, county, latitude, longitude):
+        """计算测站归属的城市"""
+        matched = []
+        for city, config in self.cities.items():
+            if county and _normalize(county) == _normalize(config["cwa_id"]):
+                matched.append(city)
+                continue
+            center = config.get("center")
+            radius = config.get("radius_km", STATION_MATCH_RADIUS_KM)
+            if center and radius > 0 and not math.isnan(latitude) and not math.isnan(longitude):
+                if _haversine_km(latitude, longitude, center[0], center[1]) <= radius:
+                    matched.append(city)
+        return matched
+
+    def build(self, snapshot):
+        """
+        为快照中的测站建立城市归属
+        :return: {城市名: [测站下标, ...]}，未知或元数据变化的测站重新计算后写回缓存
+        """
+        by_city = {city: [] for city in self.cities}
+        with self._lock:
+            self._load()
+            for i, station_id in enumerate(snapshot.ids):
+                meta = _station_meta(snapshot.counties[i], snapshot.towns[i], snapshot.latitudes[i], snapshot.longitudes[i])
+                cached = self._stations.get(station_id)
+                if cached is None or cached["meta"] != meta:
+                    cached = {"meta": meta, "cities": self._match(snapshot.counties[i], snapshot.latitudes[i], snapshot.longitudes[i])}
+                    self._stations[station_id] = cached
+                    self._dirty = True
+                for city in cached["cities"]:
+                    if city in by_city:
+                        by_city[city].append(i)
+            if self._dirty:
+                self._save()
+                self._dirty = False
+        return by_city
+
+_station_index = StationCityIndex(CITIES)
+
+def stations_for_city(snapshot, city_name):
+    """城市对应的测站下标列表（每个快照只建立一次索引）"""
+    return snapshot.derive("city_index", _station_index.build).get(city_name, [])
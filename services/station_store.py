@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+观测站快照模块
+将 O-A0002-001 / O-A0003-001 等观测数据按要素分列存储，阈值检查按列批量比较
+"""
+
+import math
+import threading
+from array import array
+from .cwa_datastore import fetch_dataset_entry
+
+try:
+    import numpy as np
+except ImportError:  # 未安装时按列逐个比较
+    np = None
+
+# 观测缺测/无效值（-99 缺测，-98 仪器故障，-998 雨量站无降雨，-999 数据异常）
+SENTINEL_VALUES = {-99.0, -98.0, -998.0, -999.0, -9999.0}
+
+NAN = float("nan")
+
+def _to_float(value):
+    """观测值转为浮点数，无效值和缺测统一为 NaN"""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return NAN
+    if number in SENTINEL_VALUES:
+        return NAN
+    return number
+
+def _coordinates(geo_info):
+    """取测站 WGS84 经纬度，没有时使用第一组坐标"""
+    coordinates = [c for c in geo_info.get("Coordinates", []) if isinstance(c, dict)]
+    if not coordinates:
+        return NAN, NAN
+    chosen = next((c for c in coordinates if c.get("CoordinateName") == "WGS84"), coordinates[0])
+    return _to_float(chosen.get("StationLatitude")), _to_float(chosen.get("StationLongitude"))
+
+class StationSnapshot:
+    """
+    一次观测数据的列式快照
+    每个观测要素一列 array('d')，第 i 个元素对应第 i 个测站；缺测为 NaN
+    """
+
+    __slots__ = ("ids", "names", "counties", "towns", "obs_times", "latitudes", "longitudes", "columns",
+                 "_np_columns", "_derived", "_lock")
+
+    def __init__(self, ids, names, counties, towns, obs_times, latitudes, longitudes, columns):
+        self.ids = ids
+        self.names = names
+        self.counties = counties
+        self.towns = towns
+        self.obs_times = obs_times
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.columns = columns
+        self._np_columns = {}
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_stations(cls, stations):
+        """由测站列表（可为流式解析的迭代器）构建快照"""
+        ids, names, counties, towns, obs_times = [], [], [], [], []
+        latitudes, longitudes = array("d"), array("d")
+        columns = {}
+
+        def put(column_name, index, value):
+            column = columns.get(column_name)
+            if column is None:
+                column = columns[column_name] = array("d", [NAN]) * index
+            if len(column) == index:  # 同一测站重复的要素以第一个为准
+                column.append(_to_float(value))
+
+        for station in stations:
+            if not isinstance(station, dict):
+                continue
+            index = len(names)
+            geo_info = station.get("GeoInfo", {})
+            names.append(station.get("StationName", ""))
+            ids.append(station.get("StationId") or names[-1])
+            counties.append(geo_info.get("CountyName", ""))
+            towns.append(geo_info.get("TownName", ""))
+            obs_time = station.get("ObsTime", "")
+            obs_times.append(obs_time.get("DateTime", "") if isinstance(obs_time, dict) else obs_time)
+            latitude, longitude = _coordinates(geo_info)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+
+            for element in station.get("WeatherElement", []):
+                if isinstance(element, dict):
+                    put(element.get("ElementName", ""), index, element.get("ElementValue"))
+
+            # 雨量要素按时段展开为 RainfallNow、RainfallPast1hr 等列
+            rainfall_element = station.get("RainfallElement", {})
+            if isinstance(rainfall_element, dict):
+                for period, rainfall in rainfall_element.items():
+                    if isinstance(rainfall, dict):
+                        put(f"Rainfall{period}", index, rainfall.get("Precipitation"))
+
+            # 本测站没有的要素补 NaN，保持各列等长
+            for column in columns.values():
+                if len(column) == index:
+                    column.append(NAN)
+
+        return cls(ids, names, counties, towns, obs_times, latitudes, longitudes, columns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def derive(self, name, builder):
+        """基于本快照构建派生结构（如测站归属索引），每个名字只构建一次"""
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = builder(self)
+        return self._derived[name]
+
+    def value(self, element, index):
+        """第 index 个测站的要素值（缺测为 NaN）"""
+        column = self.columns.get(element)
+        return column[index] if column is not None else NAN
+
+    def find(self, element, at_least=None, at_most=None, below=None):
+        """
+        查找要素值满足阈值条件的测站
+        :param at_least: 值 >= at_least
+        :param at_most: 值 <= at_most
+        :param below: 值 < below
+        :return: 满足所有条件的测站下标（按测站顺序），缺测值不会命中
+        """
+        column = self.columns.get(element)
+        if column is None or not len(column):
+            return []
+
+        if np is not None:
+            values = self._np_columns.get(element)
+            if values is None:
+                values = self._np_columns[element] = np.frombuffer(column, dtype=np.float64)
+            mask = ~np.isnan(values)
+            if at_least is not None:
+                mask &= values >= at_least
+            if at_most is not None:
+                mask &= values <= at_most
+            if below is not None:
+                mask &= values < below
+            return np.flatnonzero(mask).tolist()
+
+        low = -math.inf if at_least is None else at_least
+        high = math.inf if at_most is None else at_most
+        upper = math.inf if below is None else below
+        # NaN 的比较结果恒为 False
+        return [i for i, v in enumerate(column) if low <= v <= high and v < upper]
+
+def fetch_station_snapshot(dataset_id, timeout=15):
+    """
+    获取观测站快照，同一响应在本次运行中只解析一次
+    :param dataset_id: 观测数据集ID，如 O-A0002-001、O-A0003-001
+    :return: StationSnapshot；接口返回失败时为空快照
+    """
+    entry = fetch_dataset_entry(dataset_id, timeout=timeout)
+    if entry.field("success") != "true":
+        return StationSnapshot.from_stations([])
+    return entry.derive_items("station_snapshot", ("records", "Station"), StationSnapshot.from_stations)
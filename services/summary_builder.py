@@ -1,83 +1,89 @@
 from zoneinfo import ZoneInfo
 from datetime import datetime
+import os
 import re
-from services.doubao_ai import call_doubao_ai
+from services.doubao_ai import call_doubao_ai_parallel, call_doubao_ai_parallel_async
+from services.metrics import stage
 
-def generate_ai_future_weather_summaries(data):
-    """使用AI生成智能的未来两日天气总结"""
-    summaries = {}
+# 是否将所有城市的天气总结合并为一次AI请求（设为0则逐城市请求）
+DOUBAO_BATCH_SUMMARIES = os.getenv("DOUBAO_BATCH_SUMMARIES", "1") != "0"
+
+# AI任务名
+BATCH_SUMMARY_JOB = "future:batch"
+ALERT_DIGEST_JOB = "alert_digest"
+
+# 给AI的未来24小时详细预报：乡镇预报逐3小时共8个时段，没有时使用36小时预报的前6个时段
+DETAILED_PERIODS = 8
+FALLBACK_PERIODS = 6
+
+def _build_city_data_summary(city, weather_data):
+    """构建给AI的单个城市数据摘要"""
+    hourly = weather_data.get("detailed_hourly", [])[:DETAILED_PERIODS] or weather_data.get("hourly", [])[:FALLBACK_PERIODS]
+    weekly = weather_data.get("weekly", [])
     
-    for city, weather_data in data.items():
-        if city == "warnings":
-            continue
-            
-        # 提取未来天气数据
-        hourly = weather_data.get("hourly", [])
-        weekly = weather_data.get("weekly", [])
+    # 构建给AI的数据摘要
+    data_summary = f"城市：{city}\n\n"
+    
+    # 添加观测数据（用于AI辅助判断）
+    observations = weather_data.get("observations", {})
+    if observations:
+        data_summary += "📊 当前观测数据：\n"
         
-        if not hourly and not weekly:
-            summaries[city] = f"🌤️ **{city}未来两日天气**：数据获取中"
-            continue
+        # 极端天气观测
+        extreme_weather = observations.get("extreme_weather", [])
+        if extreme_weather:
+            data_summary += "- 极端天气观测：\n"
+            for obs in extreme_weather[:3]:  # 最多显示3条
+                data_summary += f"  * {obs.station}: {obs.kind} {obs.value}{obs.unit}\n"
         
-        # 构建给AI的数据摘要
-        data_summary = f"城市：{city}\n\n"
+        # 强降雨观测
+        heavy_rainfall = observations.get("heavy_rainfall", [])
+        if heavy_rainfall:
+            data_summary += "- 强降雨观测：\n"
+            for obs in heavy_rainfall[:3]:  # 最多显示3条
+                data_summary += f"  * {obs.station}: {obs.value}{obs.unit}\n"
         
-        # 添加观测数据（用于AI辅助判断）
-        observations = weather_data.get("observations", {})
-        if observations:
-            data_summary += "📊 当前观测数据：\n"
-            
-            # 极端天气观测
-            extreme_weather = observations.get("extreme_weather", [])
-            if extreme_weather:
-                data_summary += "- 极端天气观测：\n"
-                for obs in extreme_weather[:3]:  # 最多显示3条
-                    data_summary += f"  * {obs['station']}: {obs['type']} {obs['value']}\n"
-            
-            # 强降雨观测
-            heavy_rainfall = observations.get("heavy_rainfall", [])
-            if heavy_rainfall:
-                data_summary += "- 强降雨观测：\n"
-                for obs in heavy_rainfall[:3]:  # 最多显示3条
-                    data_summary += f"  * {obs['station']}: {obs['value']}\n"
-            
-            # 气候异常观测
-            climate_anomalies = observations.get("climate_anomalies", [])
-            if climate_anomalies:
-                data_summary += "- 气候异常观测：\n"
-                for obs in climate_anomalies[:3]:  # 最多显示3条
-                    data_summary += f"  * {obs['station']}: {obs['value']} ({obs['date']})\n"
-            
-            data_summary += "\n"
-        
-        # 添加小时预报信息（未来24小时）
-        if hourly:
-            data_summary += "未来24小时详细预报：\n"
-            for hour in hourly[:6]:  # 前6个小时的详细信息
-                data_summary += f"- {hour.get('fxTime', 'N/A')}: {hour.get('text', 'N/A')}"
-                if hour.get('temp'):
-                    data_summary += f", {hour['temp']}℃"
-                if hour.get('tempMax'):
-                    data_summary += f", 最高{hour['tempMax']}℃"
-                if hour.get('tempMin'):
-                    data_summary += f", 最低{hour['tempMin']}℃"
-                if hour.get('precip'):
-                    data_summary += f", 降雨机率{hour['precip']}%"
-                data_summary += "\n"
-        
-        # 添加日级别总结
-        if weekly:
-            data_summary += "\n未来两日总结：\n"
-            for day in weekly[:2]:
-                data_summary += f"- {day.get('fxDate', 'N/A')}: 白天{day.get('textDay', 'N/A')}, 夜间{day.get('textNight', 'N/A')}"
-                if day.get('tempMax') and day.get('tempMin'):
-                    data_summary += f", {day['tempMin']}~{day['tempMax']}℃"
-                if day.get('precip'):
-                    data_summary += f", 降雨机率{day['precip']}%"
-                data_summary += "\n"
+        # 气候异常观测
+        climate_anomalies = observations.get("climate_anomalies", [])
+        if climate_anomalies:
+            data_summary += "- 气候异常观测：\n"
+            for obs in climate_anomalies[:3]:  # 最多显示3条
+                data_summary += f"  * {obs.station}: {obs.value}{obs.unit} ({obs.obs_time})\n"
         
-        # 精简的AI提示词 - 专门用于未来天气总结（包含观测数据）
-        prompt = f"""基于天气数据和观测数据生成极简天气总结：
+        data_summary += "\n"
+    
+    # 添加小时预报信息（未来24小时）
+    if hourly:
+        data_summary += "未来24小时详细预报：\n"
+        for hour in hourly:
+            data_summary += f"- {hour.fx_time}: {hour.text}"
+            if hour.temp is not None:
+                data_summary += f", {hour.temp}℃"
+            if hour.temp_max is not None:
+                data_summary += f", 最高{hour.temp_max}℃"
+            if hour.temp_min is not None:
+                data_summary += f", 最低{hour.temp_min}℃"
+            if hour.precip is not None:
+                data_summary += f", 降雨机率{hour.precip}%"
+            data_summary += "\n"
+    
+    # 添加日级别总结
+    if weekly:
+        data_summary += "\n未来两日总结：\n"
+        for day in weekly[:2]:
+            data_summary += f"- {day.fx_date}: 白天{day.text_day}, 夜间{day.text_night}"
+            if day.temp_max is not None and day.temp_min is not None:
+                data_summary += f", {day.temp_min}~{day.temp_max}℃"
+            if day.precip is not None:
+                data_summary += f", 降雨机率{day.precip}%"
+            data_summary += "\n"
+    
+    return data_summary
+
+def _city_summary_prompt(city, data_summary):
+    """单个城市的未来天气总结提示词"""
+    # 精简的AI提示词 - 专门用于未来天气总结（包含观测数据）
+    return f"""基于天气数据和观测数据生成极简天气总结：
 
 {data_summary}
 
@@ -90,44 +96,248 @@ def generate_ai_future_weather_summaries(data):
 
 示例：多云转雷雨，27~36℃，明日午后备雨具（观测到强降雨需注意）"""
 
+def _batch_summary_prompt(data_summaries):
+    """所有城市合并为一次请求的未来天气总结提示词"""
+    city_blocks = "\n\n".join(
+        f"=== {city} ===\n{data_summary}" for city, data_summary in data_summaries.items()
+    )
+    return f"""基于各城市的天气数据和观测数据，分别生成极简天气总结：
+
+{city_blocks}
+
+要求：
+- 每个城市输出一行，共{len(data_summaries)}行，按上面的城市顺序，不要输出其他内容
+- 格式：🌤️ **城市名未来两日**：[一句话总结]
+- 长度：每行严格控制在30字以内
+- 内容：结合观测数据，包含关键天气+温度范围+一个核心提醒
+- 风格：简洁实用，如果有观测异常要特别提醒
+- 观测数据优先级：极端天气 > 强降雨 > 气候异常
+
+示例：🌤️ **台北市未来两日**：多云转雷雨，27~36℃，明日午后备雨具（观测到强降雨需注意）"""
+
+def _parse_batch_summaries(ai_output, cities):
+    """从合并请求的输出中按城市解析每行总结，无法识别的城市不返回"""
+    parsed = {}
+    for line in ai_output.splitlines():
+        match = re.search(r"\*\*(.+?)未来两日\*\*\s*[：:]\s*\S", line)
+        if match and match.group(1).strip() in cities:
+            parsed.setdefault(match.group(1).strip(), line.strip())
+    return parsed
+
+def _template_future_summary(city, weekly):
+    """AI不可用时的模板总结"""
+    # AI调用失败时的精简备用格式
+    if weekly and len(weekly) >= 2:
+        tomorrow = weekly[0]
+        day_after = weekly[1]
+        
+        # 提取温度范围
+        temps = [t for t in (tomorrow.temp_min, tomorrow.temp_max, day_after.temp_min, day_after.temp_max) if t is not None]
+        
+        temp_range = f"{min(temps)}~{max(temps)}℃" if temps else "数据获取中"
+        
+        # 主要天气现象
+        main_weather = tomorrow.text_day or '晴'
+        if '雷' in main_weather or '雨' in main_weather:
+            reminder = "备雨具"
+        elif (tomorrow.temp_max or 0) >= 35:
+            reminder = "防暑"
+        else:
+            reminder = "关注天气"
+        
+        return f"🌤️ **{city}未来两日**：{main_weather}，{temp_range}，{reminder}"
+    return f"🌤️ **{city}未来两日**：数据获取中"
 
+def _future_summary_jobs(data, batch):
+    """
+    准备未来两日天气总结的AI任务
+    :return: (总结占位字典, 各城市数据摘要, AI任务字典)
+    """
+    summaries = {}
+    data_summaries = {}
+    
+    for city, weather_data in data.items():
+        if city == "warnings":
+            continue
+            
+        # 提取未来天气数据
+        hourly = weather_data.get("hourly", [])
+        weekly = weather_data.get("weekly", [])
+        
+        if not hourly and not weekly:
+            summaries[city] = f"🌤️ **{city}未来两日天气**：数据获取中"
+            continue
+        
+        data_summaries[city] = _build_city_data_summary(city, weather_data)
+        summaries[city] = None  # 占位，保持城市顺序
+    
+    jobs = {}
+    if batch and data_summaries:
+        # 合并模式：一次请求生成所有城市的总结
+        jobs[BATCH_SUMMARY_JOB] = {"prompt": _batch_summary_prompt(data_summaries), "temperature": 0.2}
+    else:
+        for city, data_summary in data_summaries.items():
+            # 降低温度提高一致性
+            jobs[f"future:{city}"] = {"prompt": _city_summary_prompt(city, data_summary), "temperature": 0.2}
+    return summaries, data_summaries, jobs
 
-        try:
-            ai_summary = call_doubao_ai(prompt, temperature=0.2)  # 降低温度提高一致性
+def _resolve_future_summaries(data, summaries, data_summaries, results):
+    """用AI结果填充总结，失败、解析不到或超时的城市回退到模板总结"""
+    if BATCH_SUMMARY_JOB in results:
+        ai_output = results[BATCH_SUMMARY_JOB]
+        if isinstance(ai_output, Exception):
+            print(f"⚠️ AI天气总结（合并请求）生成失败: {ai_output}")
+            parsed = {}
+        else:
+            parsed = _parse_batch_summaries(ai_output, data_summaries)
+        for city in data_summaries:
+            if city in parsed:
+                summaries[city] = parsed[city]
+            else:
+                print(f"⚠️ {city} AI天气总结解析失败，使用模板总结")
+                summaries[city] = _template_future_summary(city, data[city].get("weekly", []))
+        return summaries
+    
+    for city in data_summaries:
+        ai_summary = results.get(f"future:{city}")
+        if isinstance(ai_summary, Exception) or ai_summary is None:
+            print(f"⚠️ {city} AI天气总结生成失败: {ai_summary}")
+            summaries[city] = _template_future_summary(city, data[city].get("weekly", []))
+        else:
             summaries[city] = ai_summary.strip()
-        except Exception as e:
-            print(f"⚠️ {city} AI天气总结生成失败: {e}")
-            # AI调用失败时的精简备用格式
-            if weekly and len(weekly) >= 2:
-                tomorrow = weekly[0]
-                day_after = weekly[1] if len(weekly) > 1 else {}
-                
-                # 提取温度范围
-                temps = []
-                if tomorrow.get('tempMin'): temps.append(int(tomorrow['tempMin']))
-                if tomorrow.get('tempMax'): temps.append(int(tomorrow['tempMax']))
-                if day_after.get('tempMin'): temps.append(int(day_after['tempMin']))
-                if day_after.get('tempMax'): temps.append(int(day_after['tempMax']))
+    
+    return summaries
+
+def generate_ai_future_weather_summaries(data, batch=None):
+    """
+    使用AI生成智能的未来两日天气总结
+    :param batch: 是否合并为一次AI请求，默认读取 DOUBAO_BATCH_SUMMARIES
+    """
+    batch = DOUBAO_BATCH_SUMMARIES if batch is None else batch
+    summaries, data_summaries, jobs = _future_summary_jobs(data, batch)
+    results = call_doubao_ai_parallel(jobs)
+    return _resolve_future_summaries(data, summaries, data_summaries, results)
+
+def _build_alerts_text(alerts):
+    """分类整理预警信息，构建传递给AI的预警文本"""
+    # 分类整理预警信息
+    city_alerts = []  # 市级预警（重点关注）
+    typhoon_alerts = []  # 台风预警（单独处理）
+    other_alerts = []  # 其他重要区域预警
+    
+    for alert in alerts:
+        city = alert.city or "未知地区"
+        title = alert.title
+        text = alert.text
+        alert_type = alert.type
+        
+        # 提取时间信息
+        start_time = alert.start_time
+        end_time = alert.end_time
+        
+        # 构建带时间信息的预警文本
+        time_info = ""
+        if start_time or end_time:
+            if start_time and end_time:
+                time_info = f"（{start_time}至{end_time}）"
+            elif start_time:
+                time_info = f"（生效：{start_time}）"
+            elif end_time:
+                time_info = f"（结束：{end_time}）"
+        
+        alert_with_time = f"[{city}] {title}: {text}{time_info}"
+        
+        # 台风预警单独处理
+        if "台风" in title or "台风" in alert_type:
+            typhoon_alerts.append(alert_with_time)
+        # 市级预警重点关注
+        elif "市" in city and not any(x in city for x in [",", "、", " "]):  # 单独的市
+            city_alerts.append(alert_with_time)
+        # 忽略县级预警（縣、县）
+        elif "縣" in city or "县" in city:
+            continue  # 直接跳过县级预警
+        # 其他重要区域预警（如官方预警、多区域预警等）
+        else:
+            other_alerts.append(alert_with_time)
+    
+    # 构建传递给AI的文本
+    alert_texts = []
+    
+    # 台风预警（已优化过的）
+    if typhoon_alerts:
+        alert_texts.extend(typhoon_alerts)
+    
+    # 市级预警（重点关注）
+    if city_alerts:
+        alert_texts.append("=== 重点市级预警 ===")
+        alert_texts.extend(city_alerts)
+    
+    # 其他重要区域预警（过滤县信息）
+    if other_alerts:
+        alert_texts.append("=== 其他重要区域预警 ===")
+        
+        # 对其他区域预警进行县信息过滤
+        filtered_other_alerts = []
+        for alert in other_alerts:
+            # 提取预警信息
+            parts = alert.split(": ", 1)
+            if len(parts) == 2:
+                header = parts[0]  # [城市] 标题
+                content = parts[1]  # 内容
                 
-                temp_range = f"{min(temps)}~{max(temps)}℃" if temps else "数据获取中"
+                # 过滤内容中的县信息
+                # 移除包含县的句子或短语
+                sentences = re.split(r'[，。；]', content)
+                filtered_sentences = []
                 
-                # 主要天气现象
-                main_weather = tomorrow.get('textDay', '晴')
-                if '雷' in main_weather or '雨' in main_weather:
-                    reminder = "备雨具"
-                elif int(tomorrow.get('tempMax', '0')) >= 35:
-                    reminder = "防暑"
-                else:
-                    reminder = "关注天气"
+                for sentence in sentences:
+                    # 如果句子中包含县，尝试移除县相关部分
+                    if '縣' in sentence or '县' in sentence:
+                        # 移除县名，但保留其他重要信息
+                        # 例如：将"高雄市、屏東縣山區"改为"高雄市山區"
+                        sentence = re.sub(r'[^，、]*[縣县][^，、]*[、，]?', '', sentence)
+                        sentence = re.sub(r'、+', '、', sentence)  # 清理多余的顿号
+                        sentence = re.sub(r'^[、，]+|[、，]+$', '', sentence)  # 清理开头结尾的标点
+                    
+                    # 如果句子处理后还有内容，就保留
+                    if sentence.strip():
+                        filtered_sentences.append(sentence.strip())
                 
-                summaries[city] = f"🌤️ **{city}未来两日**：{main_weather}，{temp_range}，{reminder}"
+                # 重新组合内容
+                if filtered_sentences:
+                    filtered_content = '，'.join(filtered_sentences)
+                    filtered_alert = f"{header}: {filtered_content}"
+                    filtered_other_alerts.append(filtered_alert)
             else:
-                summaries[city] = f"🌤️ **{city}未来两日**：数据获取中"
+                # 如果格式不标准，直接检查是否包含县信息
+                if not ('縣' in alert or '县' in alert):
+                    filtered_other_alerts.append(alert)
+        
+        alert_texts.extend(filtered_other_alerts)
     
-    return summaries
+    return "\n".join(alert_texts)
 
-def build_summary(data):
-    lines = []
+def _alert_digest_prompt(all_alerts_text):
+    """预警摘要提示词"""
+    # 极简预警AI提示词 - 保留重要城市名称和时间信息
+    return f"""对预警信息进行极简摘要：
+
+{all_alerts_text}
+
+要求：
+1. **台风信息**：保持现有格式
+2. **市级预警**：合并同类预警，保留重要城市名称，如有时间信息需保留
+3. **其他区域预警**：合并为1-2句话，保留关键地区名称和时间信息
+4. **总体**：总长度控制在150字以内，突出关键信息和时效性
+
+示例格式：
+- 台风：台风「XX」对台湾影响较小
+- 市级：豪雨特报覆盖台中市、高雄市、台南市（15:05-23:00）；雷雨提醒：台中市、台南市、高雄市有雷雨
+- 其他：西南气流影响，新竹市、兰屿、绿岛有强风，山区防坍方"""
+
+def _today_summaries(data):
+    """各城市今日天气概况"""
+    today = {}
 
     # 今日天气摘要 - 简化为全天概况
     for city, content in data.items():
@@ -143,29 +353,29 @@ def build_summary(data):
             
             if hourly:
                 # 从小时数据中提取主要天气现象
-                weather_texts = [entry.get("text", "") for entry in hourly if entry.get("text")]
+                weather_texts = [entry.text for entry in hourly if entry.text]
                 main_weather = max(set(weather_texts), key=weather_texts.count) if weather_texts else "晴"
                 
                 # 构建简化的全天天气摘要
                 if temp_max and temp_min:
-                    lines.append(f"【{city}】今日天气：{main_weather}，{temp_min} ~ {temp_max}℃")
+                    today[city] = f"【{city}】今日天气：{main_weather}，{temp_min} ~ {temp_max}℃"
                 else:
-                    lines.append(f"【{city}】今日天气：{main_weather}")
+                    today[city] = f"【{city}】今日天气：{main_weather}"
             else:
                 # 如果没有小时数据，从weekly数据获取
                 weekly = content.get("weekly", [])
                 if weekly:
                     today_weekly = weekly[0]
-                    weather = today_weekly.get("textDay", "晴")
-                    temp_max = today_weekly.get("tempMax", "")
-                    temp_min = today_weekly.get("tempMin", "")
+                    weather = today_weekly.text_day or "晴"
+                    temp_max = today_weekly.temp_max
+                    temp_min = today_weekly.temp_min
                     
                     if temp_max and temp_min:
-                        lines.append(f"【{city}】今日天气：{weather}，{temp_min} ~ {temp_max}℃")
+                        today[city] = f"【{city}】今日天气：{weather}，{temp_min} ~ {temp_max}℃"
                     else:
-                        lines.append(f"【{city}】今日天气：{weather}")
+                        today[city] = f"【{city}】今日天气：{weather}"
                 else:
-                    lines.append(f"【{city}】今日天气：数据获取中")
+                    today[city] = f"【{city}】今日天气：数据获取中"
         else:
             # 兜底：从hourly数据构建
             hourly = content.get("hourly", [])
@@ -176,173 +386,99 @@ def build_summary(data):
                 
                 for entry in hourly:
                     try:
-                        dt = datetime.fromisoformat(entry["fxTime"]).astimezone(ZoneInfo("Asia/Taipei"))
-                        if dt.date() == datetime.now(ZoneInfo("Asia/Taipei")).date():
-                            today_hourly.append(entry)
-                            temp_str = entry.get("temp", "")
-                            if temp_str and temp_str.strip():
-                                try:
-                                    temp_all.append(int(temp_str))
-                                except (ValueError, TypeError):
-                                    pass
-                    except:
+                        dt = datetime.fromisoformat(entry.fx_time).astimezone(ZoneInfo("Asia/Taipei"))
+                    except ValueError:
                         continue
+                    if dt.date() == datetime.now(ZoneInfo("Asia/Taipei")).date():
+                        today_hourly.append(entry)
+                        if entry.temp is not None:
+                            temp_all.append(entry.temp)
                 
                 if today_hourly:
-                    weather_texts = [entry.get("text", "") for entry in today_hourly if entry.get("text")]
+                    weather_texts = [entry.text for entry in today_hourly if entry.text]
                     main_weather = max(set(weather_texts), key=weather_texts.count) if weather_texts else "晴"
                     
                     if temp_all:
                         temp_min = min(temp_all)
                         temp_max = max(temp_all)
-                        lines.append(f"【{city}】今日天气：{main_weather}，{temp_min} ~ {temp_max}℃")
+                        today[city] = f"【{city}】今日天气：{main_weather}，{temp_min} ~ {temp_max}℃"
                     else:
-                        lines.append(f"【{city}】今日天气：{main_weather}")
+                        today[city] = f"【{city}】今日天气：{main_weather}"
                 else:
-                    lines.append(f"【{city}】今日天气：数据获取中")
+                    today[city] = f"【{city}】今日天气：数据获取中"
             else:
-                lines.append(f"【{city}】今日天气：数据获取中")
-        
-        lines.append("")
-
-    # AI驱动的未来两日天气总结
-    future_summaries = generate_ai_future_weather_summaries(data)
-    for city, summary in future_summaries.items():
-        lines.append(summary)
-        lines.append("")
+                today[city] = f"【{city}】今日天气：数据获取中"
+    return today
 
-    # ✅ 天气预警 - 简化显示：只关注市级预警和其他重要区域预警，忽略县级预警
+def _summary_jobs(data):
+    """
+    未来两日天气总结和预警摘要的AI任务
+    :return: (模板总结, 城市数据摘要, 预警原文, {任务名: call_doubao_ai 的关键字参数})
+    """
     alerts = data.get("warnings", [])
+    summaries, data_summaries, jobs = _future_summary_jobs(data, DOUBAO_BATCH_SUMMARIES)
+    all_alerts_text = ""
     if alerts:
-        # 分类整理预警信息
-        city_alerts = []  # 市级预警（重点关注）
-        typhoon_alerts = []  # 台风预警（单独处理）
-        other_alerts = []  # 其他重要区域预警
-        
-        for alert in alerts:
-            city = alert.get("city", "未知地区")
-            title = alert.get("title", "")
-            text = alert.get("text", "")
-            alert_type = alert.get("type", "")
-            
-            # 提取时间信息
-            start_time = alert.get("startTime", "")
-            end_time = alert.get("endTime", "")
-            issue_time = alert.get("issueTime", "")
-            
-            # 构建带时间信息的预警文本
-            time_info = ""
-            if start_time or end_time:
-                if start_time and end_time:
-                    time_info = f"（{start_time}至{end_time}）"
-                elif start_time:
-                    time_info = f"（生效：{start_time}）"
-                elif end_time:
-                    time_info = f"（结束：{end_time}）"
-            
-            alert_with_time = f"[{city}] {title}: {text}{time_info}"
-            
-            # 台风预警单独处理
-            if "台风" in title or "台风" in alert_type:
-                typhoon_alerts.append(alert_with_time)
-            # 市级预警重点关注
-            elif "市" in city and not any(x in city for x in [",", "、", " "]):  # 单独的市
-                city_alerts.append(alert_with_time)
-            # 忽略县级预警（縣、县）
-            elif "縣" in city or "县" in city:
-                continue  # 直接跳过县级预警
-            # 其他重要区域预警（如官方预警、多区域预警等）
-            else:
-                other_alerts.append(alert_with_time)
-        
-        # 构建传递给AI的文本
-        alert_texts = []
-        
-        # 台风预警（已优化过的）
-        if typhoon_alerts:
-            alert_texts.extend(typhoon_alerts)
-        
-        # 市级预警（重点关注）
-        if city_alerts:
-            alert_texts.append("=== 重点市级预警 ===")
-            alert_texts.extend(city_alerts)
-        
-        # 其他重要区域预警（过滤县信息）
-        if other_alerts:
-            alert_texts.append("=== 其他重要区域预警 ===")
-            
-            # 对其他区域预警进行县信息过滤
-            filtered_other_alerts = []
-            for alert in other_alerts:
-                # 提取预警信息
-                parts = alert.split(": ", 1)
-                if len(parts) == 2:
-                    header = parts[0]  # [城市] 标题
-                    content = parts[1]  # 内容
-                    
-                    # 过滤内容中的县信息
-                    # 移除包含县的句子或短语
-                    sentences = re.split(r'[，。；]', content)
-                    filtered_sentences = []
-                    
-                    for sentence in sentences:
-                        # 如果句子中包含县，尝试移除县相关部分
-                        if '縣' in sentence or '县' in sentence:
-                            # 移除县名，但保留其他重要信息
-                            # 例如：将"高雄市、屏東縣山區"改为"高雄市山區"
-                            sentence = re.sub(r'[^，、]*[縣县][^，、]*[、，]?', '', sentence)
-                            sentence = re.sub(r'、+', '、', sentence)  # 清理多余的顿号
-                            sentence = re.sub(r'^[、，]+|[、，]+$', '', sentence)  # 清理开头结尾的标点
-                        
-                        # 如果句子处理后还有内容，就保留
-                        if sentence.strip():
-                            filtered_sentences.append(sentence.strip())
-                    
-                    # 重新组合内容
-                    if filtered_sentences:
-                        filtered_content = '，'.join(filtered_sentences)
-                        filtered_alert = f"{header}: {filtered_content}"
-                        filtered_other_alerts.append(filtered_alert)
-                else:
-                    # 如果格式不标准，直接检查是否包含县信息
-                    if not ('縣' in alert or '县' in alert):
-                        filtered_other_alerts.append(alert)
-            
-            alert_texts.extend(filtered_other_alerts)
-        
-        all_alerts_text = "\n".join(alert_texts)
-        
-        # 调用豆包AI进行摘要，并提供优化指导
-        try:
-            # 极简预警AI提示词 - 保留重要城市名称和时间信息
-            optimized_prompt = f"""对预警信息进行极简摘要：
+        all_alerts_text = _build_alerts_text(alerts)
+        jobs[ALERT_DIGEST_JOB] = {"prompt": _alert_digest_prompt(all_alerts_text)}
+    return summaries, data_summaries, all_alerts_text, jobs
 
-{all_alerts_text}
-
-要求：
-1. **台风信息**：保持现有格式
-2. **市级预警**：合并同类预警，保留重要城市名称，如有时间信息需保留
-3. **其他区域预警**：合并为1-2句话，保留关键地区名称和时间信息
-4. **总体**：总长度控制在150字以内，突出关键信息和时效性
+def _assemble_sections(data, today, summaries, data_summaries, all_alerts_text, results):
+    """用AI任务结果组装摘要各部分，失败或超时的任务使用非AI模板"""
+    alerts = data.get("warnings", [])
 
-示例格式：
-- 台风：台风「XX」对台湾影响较小
-- 市级：豪雨特报覆盖台中市、高雄市、台南市（15:05-23:00）；雷雨提醒：台中市、台南市、高雄市有雷雨
-- 其他：西南气流影响，新竹市、兰屿、绿岛有强风，山区防坍方"""
-            
+    # AI驱动的未来两日天气总结
+    future = _resolve_future_summaries(data, summaries, data_summaries, results)
 
-            
-            ai_summary = call_doubao_ai(optimized_prompt)
-        except Exception as e:
+    # ✅ 天气预警 - 简化显示：只关注市级预警和其他重要区域预警，忽略县级预警
+    if alerts:
+        # 调用豆包AI进行摘要，失败或超时时输出原始预警
+        ai_summary = results.get(ALERT_DIGEST_JOB)
+        if isinstance(ai_summary, Exception):
+            print(f"⚠️ 预警AI摘要生成失败: {ai_summary}")
             ai_summary = "AI摘要失败，原始预警如下：\n" + all_alerts_text
         
         # 获取当前时间作为预警摘要的时间戳
         current_time = datetime.now().strftime('%m月%d日 %H:%M')
         
-        lines.append(f"⚠️ 当前预警摘要（{current_time}）：")
-        lines.append(ai_summary)
+        alert_summary = f"⚠️ 当前预警摘要（{current_time}）：\n{ai_summary}"
     else:
-        lines.append("✅ 当前无天气预警")
+        alert_summary = "✅ 当前无天气预警"
+
+    return "天气预报", {"today": today, "future": future, "alerts": alert_summary}
+
+@stage("summary")
+def build_summary_sections(data):
+    """
+    构建摘要的各部分，供合并订阅、各城市订阅和预警订阅共用
+    AI任务（未来两日天气总结和预警摘要）并发执行，截止时间内未完成的使用非AI模板
+    :return: (标题, {"today": {城市: 今日天气}, "future": {城市: 未来两日总结}, "alerts": 预警摘要})
+    """
+    today = _today_summaries(data)
+    summaries, data_summaries, all_alerts_text, jobs = _summary_jobs(data)
+    results = call_doubao_ai_parallel(jobs)
+    return _assemble_sections(data, today, summaries, data_summaries, all_alerts_text, results)
 
-    summary = "\n".join(lines)
-    return "天气预报", summary
\ No newline at end of file
+@stage("summary")
+async def build_summary_sections_async(data):
+    """build_summary_sections 的异步版本：AI任务通过共享的异步HTTP客户端并发执行"""
+    today = _today_summaries(data)
+    summaries, data_summaries, all_alerts_text, jobs = _summary_jobs(data)
+    results = await call_doubao_ai_parallel_async(jobs)
+    return _assemble_sections(data, today, summaries, data_summaries, all_alerts_text, results)
+
+def compose_summary(sections):
+    """把各部分合并为完整摘要：各城市今日天气、未来两日总结、预警摘要"""
+    lines = []
+    for text in sections["today"].values():
+        lines.append(text)
+        lines.append("")
+    for text in sections["future"].values():
+        lines.append(text)
+        lines.append("")
+    lines.append(sections["alerts"])
+    return "\n".join(lines)
+
+def build_summary(data):
+    title, sections = build_summary_sections(data)
+    return title, compose_summary(sections)
\ No newline at end of file
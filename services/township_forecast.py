@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+乡镇预报模块
+一次下载城市的 F-D0047 乡镇预报，建立 乡镇区 → 预报 的索引；
+各区的逐3小时序列只在首次读取时解析，城市天气和预警扫描共用同一份索引
+"""
+
+import threading
+from .cwa_datastore import fetch_dataset_entry
+from .models import ForecastPeriod, DistrictForecast, normalize_time, parse_int
+
+def _current_period(location):
+    """只读取各要素的第一个时段（最新数据），不解析完整序列"""
+    current = ForecastPeriod("")
+    for element in location.get("weatherElement", []):
+        element_name = element.get("elementName", "")
+        times = element.get("time", [])
+        if not times:
+            continue
+        time_data = times[0]
+        element_value = (time_data.get("elementValue") or [{}])[0]
+        if element_name == "天氣現象":
+            current.fx_time = normalize_time(time_data.get("StartTime", ""))
+            current.text = element_value.get("Weather", "")
+            current.icon = element_value.get("WeatherCode", "")
+        elif element_name == "3小時降雨機率":
+            current.precip = parse_int(element_value.get("ProbabilityOfPrecipitation"))
+        elif element_name == "溫度":
+            current.temp = parse_int(element_value.get("Temperature"))
+    return current
+
+def _parse_district(name, location):
+    """解析一个乡镇区的各要素，按标准化时间合并到同一时段"""
+    series = {}
+    description = ""
+    
+    def period_at(fx_time):
+        period = series.get(fx_time)
+        if period is None:
+            period = series[fx_time] = ForecastPeriod(fx_time)
+        return period
+    
+    for element in location.get("weatherElement", []):
+        element_name = element.get("elementName", "")
+        for index, time_data in enumerate(element.get("time", [])):
+            element_value = (time_data.get("elementValue") or [{}])[0]
+            # 时段类要素为 StartTime，温度等时点要素为 DataTime
+            fx_time = normalize_time(time_data.get("StartTime") or time_data.get("DataTime", ""))
+            
+            if element_name == "天氣現象":
+                period = period_at(fx_time)
+                period.text = element_value.get("Weather", "")
+                period.icon = element_value.get("WeatherCode", "")
+            elif element_name == "3小時降雨機率":
+                period_at(fx_time).precip = parse_int(element_value.get("ProbabilityOfPrecipitation"))
+            elif element_name == "溫度":
+                period_at(fx_time).temp = parse_int(element_value.get("Temperature"))
+            elif element_name == "天氣預報綜合描述" and index == 0:
+                # 综合描述，包含温度、湿度、风速等
+                description = element_value.get("WeatherDescription", "")
+    
+    # 标准化时间可直接按字符串排序
+    periods = [series[fx_time] for fx_time in sorted(series) if fx_time]
+    return DistrictForecast(name, periods, _current_period(location), description)
+
+class TownshipIndex:
+    """
+    乡镇预报的区域索引
+    建立时只遍历区域列表记录 区域名 → 原始记录，某个区的预报在首次读取时才解析并缓存；
+    只需要最新时段时用 current()，不解析完整序列
+    """
+
+    __slots__ = ("_locations", "_views", "_current", "_lock")
+
+    def __init__(self, data):
+        self._locations = {}
+        self._views = {}
+        self._current = {}
+        self._lock = threading.Lock()
+        if data.get("success") == "true":
+            for group in data.get("records", {}).get("locations", []):
+                for location in group.get("location", []):
+                    name = location.get("locationName", "")
+                    if name:
+                        self._locations.setdefault(name, location)
+
+    def __len__(self):
+        return len(self._locations)
+
+    def districts(self):
+        """区域名列表（保持接口中的顺序）"""
+        return list(self._locations)
+
+    def get(self, district):
+        """返回该区的 DistrictForecast，不存在时返回 None"""
+        view = self._views.get(district)
+        if view is None:
+            location = self._locations.get(district)
+            if location is None:
+                return None
+            with self._lock:
+                view = self._views.get(district)
+                if view is None:
+                    view = self._views[district] = _parse_district(district, location)
+        return view
+
+    def current(self, district):
+        """返回该区各要素的第一个时段（ForecastPeriod），不存在时返回 None"""
+        view = self._views.get(district)
+        if view is not None:
+            return view.current
+        period = self._current.get(district)
+        if period is None:
+            location = self._locations.get(district)
+            if location is None:
+                return None
+            period = self._current.setdefault(district, _current_period(location))
+        return period
+
+    def first(self):
+        """第一个区域的预报（作为城市代表），没有区域时返回 None"""
+        return self.get(next(iter(self._locations), None))
+
+def fetch_township_index(dataset_id, timeout=10):
+    """获取城市乡镇预报的区域索引（同一份数据只建一次索引）"""
+    entry = fetch_dataset_entry(dataset_id, timeout=timeout)
+    return entry.derive("township_index", TownshipIndex)
+
+def fetch_district_forecast(dataset_id, district=None, timeout=10):
+    """获取某个乡镇区的预报；未指定区域时取第一个区域，不存在时返回 None"""
+    index = fetch_township_index(dataset_id, timeout=timeout)
+    return index.get(district) if district else index.first()
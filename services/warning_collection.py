@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预警集合模块
+按插入顺序保存预警，并维护 (城市, 关键词)、城市、来源索引，去重检查无需遍历整个列表
+添加时为每条预警生成确定性标识（id）
+"""
+
+from collections import defaultdict
+from .keyword_matcher import KeywordMatcher
+from .warning_store import warning_id
+
+class WarningCollection:
+    """
+    预警集合
+    :param keywords: 需要按 (城市, 关键词) 建立索引的关键词；预警文本包含这些关键词时在添加时登记
+    """
+
+    def __init__(self, keywords=()):
+        self._items = []
+        keywords = list(dict.fromkeys(keywords))
+        self._keyword_set = set(keywords)
+        self._matcher = KeywordMatcher(keywords)
+        self._by_city = defaultdict(list)
+        self._by_source = defaultdict(list)
+        self._city_keywords = set()
+
+    def append(self, warning):
+        """添加一条预警（WeatherWarning）并更新索引"""
+        if not warning.id:
+            warning.id = warning_id(warning)
+        self._items.append(warning)
+        city = warning.city
+        self._by_city[city].append(warning)
+        self._by_source[warning.source].append(warning)
+        for keyword in self._matcher.keywords_in(warning.text):
+            self._city_keywords.add((city, keyword))
+
+    def extend(self, warnings):
+        """批量添加预警"""
+        for warning in warnings:
+            self.append(warning)
+
+    def has_city(self, city):
+        """该城市是否已有预警"""
+        return bool(self._by_city.get(city))
+
+    def has_keyword(self, city, keyword):
+        """该城市是否已有文本包含关键词的预警"""
+        if keyword in self._keyword_set:
+            return (city, keyword) in self._city_keywords
+        # 未登记的关键词只扫描该城市的预警
+        return any(keyword in w.text for w in self._by_city.get(city, ()))
+
+    def by_city(self, city):
+        """该城市的全部预警"""
+        return list(self._by_city.get(city, ()))
+
+    def by_source(self, source):
+        """某一来源的全部预警"""
+        return list(self._by_source.get(source, ()))
+
+    def count_source(self, source):
+        """某一来源的预警数量"""
+        return len(self._by_source.get(source, ()))
+
+    def to_list(self):
+        """按插入顺序返回预警列表"""
+        return list(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
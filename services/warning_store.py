@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预警生命周期模块
+为每条预警生成确定性的标识，并在本地 SQLite 中记录首次出现、最近出现和解除时间，
+后续阶段可以只处理新增或内容变化的预警
+"""
+
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from .city_config import get_cache_dir
+from .models import format_number
+
+# 是否记录预警生命周期（设为0关闭）
+WARNING_STORE_ENABLED = os.getenv("WARNING_STORE", "1") != "0"
+
+# 已解除预警的保留天数，超过后从库中删除
+WARNING_RETENTION_DAYS = int(os.getenv("WARNING_RETENTION_DAYS", "30"))
+
+# 各来源用于区分预警事件的字段（WeatherWarning 属性）；未列出的来源按类型、标题和地区区分
+_IDENTITY_FIELDS = {
+    "CWA": ("type", "typhoon_name"),                                                 # 台风：同一台风的路径更新视为内容变化
+    "CWA地震测报": ("title", "earthquake_no", "origin_time"),                        # 地震：地震编号
+    "CWA预警系统": ("city", "phenomena", "significance", "start_time", "end_time"),   # 地区预警：现象 + 有效时间
+    "CWA特报系统": ("title", "city", "issue_time"),                                  # 天气特报：发布时间
+    "CWA观测站": ("title", "station_id"),                                            # 观测：测站（观测时间计入内容摘要）
+    "CWA雨量站": ("title", "station_id")
+}
+_DEFAULT_IDENTITY_FIELDS = ("type", "title", "city")
+
+# 预警状态
+STATUS_NEW = "new"
+STATUS_CHANGED = "changed"
+STATUS_ACTIVE = "active"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    city TEXT NOT NULL,
+    text TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    expired_at TEXT
+)
+"""
+
+def warning_id(warning):
+    """预警的确定性标识：来源 + 该来源的区分字段，相同事件在每次运行中得到相同标识"""
+    fields = _IDENTITY_FIELDS.get(warning.source, _DEFAULT_IDENTITY_FIELDS)
+    raw = "\x1f".join([warning.source] + [f"{field}={format_number(getattr(warning, field)).strip()}" for field in fields])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def _content_digest(warning):
+    """预警内容摘要：标识不变而内容变化时视为更新（观测预警的新一次观测也算更新）"""
+    raw = "\x1f".join([warning.title, warning.city, warning.text, warning.obs_time])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+class WarningStore:
+    """
+    预警生命周期存储
+    :param path: SQLite 文件路径，默认 <缓存目录>/warnings.sqlite3
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), "warnings.sqlite3")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute(_SCHEMA)
+        return conn
+
+    def sync(self, warnings, now=None):
+        """
+        记录本次运行的预警，并为每条预警标注状态
+        本次出现的预警更新最近出现时间；之前仍有效、本次未出现的预警记为解除
+        :param warnings: 带 id 的预警（WeatherWarning）列表；会写入 status（new / changed / active）和 first_seen
+        :return: {"new": 数量, "changed": 数量, "active": 数量, "expired": 数量}
+        """
+        now = now or _now()
+        counts = {STATUS_NEW: 0, STATUS_CHANGED: 0, STATUS_ACTIVE: 0, "expired": 0}
+
+        with closing(self._connect()) as conn, conn:
+            stored = {row["id"]: row for row in conn.execute("SELECT id, digest, first_seen, expired_at FROM warnings")}
+
+            seen = {}
+            for warning in warnings:
+                wid = warning.id or warning_id(warning)
+                digest = _content_digest(warning)
+                if wid in seen:
+                    status, first_seen = seen[wid]
+                else:
+                    row = stored.get(wid)
+                    if row is None or row["expired_at"] is not None:
+                        status, first_seen = STATUS_NEW, now
+                    else:
+                        status = STATUS_ACTIVE if row["digest"] == digest else STATUS_CHANGED
+                        first_seen = row["first_seen"]
+                    seen[wid] = (status, first_seen)
+                    counts[status] += 1
+                    conn.execute(
+                        "INSERT INTO warnings (id, source, type, title, city, text, digest, first_seen, last_seen, expired_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL) "
+                        "ON CONFLICT(id) DO UPDATE SET title = excluded.title, city = excluded.city, text = excluded.text, "
+                        "digest = excluded.digest, first_seen = excluded.first_seen, last_seen = excluded.last_seen, expired_at = NULL",
+                        (wid, warning.source, warning.type, warning.title, warning.city, warning.text,
+                         digest, first_seen, now)
+                    )
+                warning.status = status
+                warning.first_seen = first_seen
+
+            expired = [(now, wid) for wid, row in stored.items() if row["expired_at"] is None and wid not in seen]
+            conn.executemany("UPDATE warnings SET expired_at = ? WHERE id = ?", expired)
+            counts["expired"] = len(expired)
+
+            cutoff = (datetime.fromisoformat(now) - timedelta(days=WARNING_RETENTION_DAYS)).isoformat(timespec="seconds")
+            conn.execute("DELETE FROM warnings WHERE expired_at IS NOT NULL AND expired_at < ?", (cutoff,))
+
+        return counts
+
+    def get(self, wid):
+        """按标识读取预警记录"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM warnings WHERE id = ?", (wid,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def active(self):
+        """当前仍有效的预警记录（按首次出现时间排序）"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM warnings WHERE expired_at IS NULL ORDER BY first_seen, id").fetchall()
+        return [dict(row) for row in rows]
+
+def track_warnings(warnings, store=None):
+    """
+    记录预警生命周期并标注状态；存储不可用时只打印提示，不影响预警获取
+    :return: sync 的统计结果，未启用或失败时为 None
+    """
+    if not WARNING_STORE_ENABLED:
+        return None
+    try:
+        counts = (store or WarningStore()).sync(warnings)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ 记录预警状态失败: {e}")
+        return None
+    print(f"🗂️ 预警状态：新增 {counts[STATUS_NEW]}，更新 {counts[STATUS_CHANGED]}，"
+          f"持续 {counts[STATUS_ACTIVE]}，解除 {counts['expired']}")
+    return counts
@@ -5,9 +5,50 @@
 负责获取中央气象署的天气数据
 """
 
-from .http_client import safe_request
-from .city_config import get_cwa_api_key
-from .observation_fetcher import fetch_observation_data_for_city
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from .cwa_datastore import fetch_dataset, dataset_run, prefetch_datasets_async
+from .township_forecast import fetch_district_forecast
+from .county_forecast import fetch_county_forecast, county_forecast_datasets
+from .observation_fetcher import fetch_observation_data_for_city, observation_datasets
+from .models import ForecastPeriod, DailyForecast, normalize_time, parse_int, parse_float
+
+def city_datasets(city_config):
+    """城市天气需要的数据集列表：(数据集ID, 参数, 超时秒数)"""
+    datasets = county_forecast_datasets()
+    datasets.append((city_config["dataset_id"], {}, 10))
+    return datasets + observation_datasets()
+
+def _parse_description(description, now):
+    """从乡镇预报综合描述中提取当前温度、湿度、风速和天气"""
+    # 提取温度信息
+    if "溫度攝氏" in description:
+        temp_match = description.split("溫度攝氏")[1].split("度")[0]
+        if temp_match.isdigit():
+            now["temp"] = int(temp_match)
+    
+    # 提取湿度信息
+    if "相對濕度" in description:
+        humidity_match = description.split("相對濕度")[1].split("%")[0]
+        if humidity_match.isdigit():
+            now["humidity"] = int(humidity_match)
+    
+    # 提取风速信息
+    if "平均風速" in description:
+        now["windSpeed"] = description.split("平均風速")[1].split("級")[0]
+    
+    # 提取天气描述
+    if "。" in description:
+        now["text"] = description.split("。")[0]
+
+def _forecast_dates(hourly):
+    """今日和明日的日期：取36小时预报第一个时段的开始日期，无法解析时使用台北当前日期"""
+    try:
+        today = datetime.strptime(hourly[0].fx_time[:10], "%Y-%m-%d").date()
+    except (IndexError, ValueError):
+        today = datetime.now(ZoneInfo("Asia/Taipei")).date()
+    return today.isoformat(), (today + timedelta(days=1)).isoformat()
 
 def fetch_cwa_weather(city_name, city_config):
     """获取中央气象署天气数据"""
@@ -17,187 +58,75 @@ def fetch_cwa_weather(city_name, city_config):
         "hourly": [],
         "weekly": [],
         "now": {},
+        "detailed_hourly": [],  # 乡镇预报逐3小时序列（72小时）
         "observations": {}  # 添加观测数据字段
     }
     
     try:
+        # 时段索引：标准化时间 → 预报时段，合并各数据集时按时间直接定位
+        hourly_index = {}
+        
         # 1. 获取36小时天气预报（基础预报）
-        url = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001"
-        params = {
-            "Authorization": get_cwa_api_key(),
-            "format": "JSON",
-            "locationName": city_config["cwa_id"]
-        }
+        location = fetch_county_forecast(city_config["cwa_id"])
+        if location:
+            weather_elements = location.get("weatherElement", [])
         
-        resp = safe_request(url, params=params, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            if data.get("success") == "true":
-                records = data.get("records", {})
-                locations = records.get("location", [])
+            # 解析天气元素
+            for element in weather_elements:
+                element_name = element.get("elementName", "")
+                times = element.get("time", [])
+            
+                # 获取今日和明日数据
+                for time_data in times[:4]:  # 前4个时段（今日和明日）
+                    start_time = normalize_time(time_data.get("startTime", ""))
+                    parameter = time_data.get("parameter", {})
                 
-                if locations:
-                    location = locations[0]
-                    weather_elements = location.get("weatherElement", [])
-                    
-                    # 解析天气元素
-                    for element in weather_elements:
-                        element_name = element.get("elementName", "")
-                        times = element.get("time", [])
-                        
-                        if times:
-                            # 获取今日和明日数据
-                            for time_data in times[:4]:  # 前4个时段（今日和明日）
-                                start_time = time_data.get("startTime", "")
-                                end_time = time_data.get("endTime", "")
-                                parameter = time_data.get("parameter", {})
-                                
-                                # 构建小时数据
-                                if element_name == "Wx":  # 天气现象
-                                    weather_text = parameter.get("parameterName", "")
-                                    weather_code = parameter.get("parameterValue", "")
-                                    
-                                    # 检查是否已存在该时间的数据
-                                    existing_entry = None
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == start_time:
-                                            existing_entry = entry
-                                            break
-                                    
-                                    if existing_entry:
-                                        existing_entry["text"] = weather_text
-                                        existing_entry["icon"] = weather_code
-                                    else:
-                                        # 创建新的小时数据条目
-                                        hourly_entry = {
-                                            "fxTime": start_time,
-                                            "text": weather_text,
-                                            "icon": weather_code,
-                                            "temp": "",
-                                            "humidity": "",
-                                            "windSpeed": "",
-                                            "precip": ""
-                                        }
-                                        weather_data["hourly"].append(hourly_entry)
-                                
-                                elif element_name == "MaxT":  # 最高温度
-                                    max_temp = parameter.get("parameterName", "")
-                                    # 更新对应时间的最高温度作为当前温度（近似值）
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == start_time:
-                                            # 使用最高温度作为当前温度的近似值
-                                            entry["temp"] = max_temp
-                                            entry["tempMax"] = max_temp  # 添加最高温度字段
-                                            break
-                                
-                                elif element_name == "MinT":  # 最低温度
-                                    min_temp = parameter.get("parameterName", "")
-                                    # 更新对应时间的最低温度
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == start_time:
-                                            entry["tempMin"] = min_temp  # 添加最低温度字段
-                                            break
-                                
-                                elif element_name == "PoP":  # 降雨机率
-                                    pop_value = parameter.get("parameterName", "")
-                                    # 更新对应时间的降雨机率
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == start_time:
-                                            entry["precip"] = pop_value
-                                            break
+                    # 构建小时数据：天气现象建立时段，其余要素更新已有时段
+                    if element_name == "Wx":  # 天气现象
+                        entry = hourly_index.get(start_time)
+                        if entry is None:
+                            entry = hourly_index[start_time] = ForecastPeriod(start_time)
+                            weather_data["hourly"].append(entry)
+                        entry.text = parameter.get("parameterName", "")
+                        entry.icon = parameter.get("parameterValue", "")
+                        continue
                 
-                print(f"✅ 中央气象署 {city_name} 36小时预报获取成功")
+                    entry = hourly_index.get(start_time)
+                    if entry is None:
+                        continue
+                    if element_name == "MaxT":  # 最高温度，同时作为当前温度的近似值
+                        entry.temp = entry.temp_max = parse_int(parameter.get("parameterName"))
+                    elif element_name == "MinT":  # 最低温度
+                        entry.temp_min = parse_int(parameter.get("parameterName"))
+                    elif element_name == "PoP":  # 降雨机率
+                        entry.precip = parse_int(parameter.get("parameterName"))
+            
+            print(f"✅ 中央气象署 {city_name} 36小时预报获取成功")
         
-        # 2. 获取乡镇预报（更详细的数据）
-        url = f"https://opendata.cwa.gov.tw/api/v1/rest/datastore/{city_config['dataset_id']}"
-        params = {
-            "Authorization": get_cwa_api_key(),
-            "format": "JSON"
-        }
+        # 2. 获取乡镇预报（更详细的数据）：代表区域（默认第一个区域）的完整逐3小时序列
+        district = fetch_district_forecast(city_config["dataset_id"], city_config.get("district"))
+        detailed = district.periods if district else []
+        weather_data["detailed_hourly"] = detailed
+        if district and district.description:
+            # 综合描述，包含温度、湿度、风速等
+            _parse_description(district.description, weather_data["now"])
         
-        resp = safe_request(url, params=params, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            if data.get("success") == "true":
-                records = data.get("records", {})
-                locations = records.get("locations", [])
-                
-                if locations:
-                    location = locations[0]
-                    location_elements = location.get("location", [])
-                    
-                    # 获取第一个区域的详细数据作为代表
-                    if location_elements:
-                        first_area = location_elements[0]
-                        weather_elements = first_area.get("weatherElement", [])
-                        
-                        # 解析乡镇预报数据
-                        for element in weather_elements:
-                            element_name = element.get("elementName", "")
-                            times = element.get("time", [])
-                            
-                            if times:
-                                # 获取最新数据
-                                time_data = times[0]
-                                element_value = time_data.get("elementValue", [{}])[0]
-                                start_time = time_data.get("StartTime", "")
-                                
-                                if element_name == "天氣現象":
-                                    # 天气现象
-                                    weather_text = element_value.get("Weather", "")
-                                    weather_code = element_value.get("WeatherCode", "")
-                                    
-                                    # 转换时间格式以匹配36小时预报的格式
-                                    # 从 ISO 格式 (2025-07-30T12:00:00+08:00) 转换为简单格式 (2025-07-30 12:00:00)
-                                    simple_time = start_time.replace("T", " ").split("+")[0]
-                                    
-                                    # 更新对应时间的天气数据
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == simple_time:
-                                            entry["text"] = weather_text
-                                            entry["icon"] = weather_code
-                                            break
-                                
-                                elif element_name == "3小時降雨機率":
-                                    # 降雨机率
-                                    pop_value = element_value.get("ProbabilityOfPrecipitation", "")
-                                    
-                                    # 转换时间格式
-                                    simple_time = start_time.replace("T", " ").split("+")[0]
-                                    
-                                    # 更新对应时间的降雨机率
-                                    for entry in weather_data["hourly"]:
-                                        if entry["fxTime"] == simple_time:
-                                            entry["precip"] = pop_value
-                                            break
-                                
-                                elif element_name == "天氣預報綜合描述":
-                                    # 综合描述，包含温度、湿度、风速等
-                                    description = element_value.get("WeatherDescription", "")
-                                    if description and not weather_data["now"]:
-                                        # 提取温度信息
-                                        if "溫度攝氏" in description:
-                                            temp_match = description.split("溫度攝氏")[1].split("度")[0]
-                                            if temp_match.isdigit():
-                                                weather_data["now"]["temp"] = temp_match
-                                        
-                                        # 提取湿度信息
-                                        if "相對濕度" in description:
-                                            humidity_match = description.split("相對濕度")[1].split("%")[0]
-                                            if humidity_match.isdigit():
-                                                weather_data["now"]["humidity"] = humidity_match
-                                        
-                                        # 提取风速信息
-                                        if "平均風速" in description:
-                                            wind_match = description.split("平均風速")[1].split("級")[0]
-                                            weather_data["now"]["windSpeed"] = wind_match
-                                        
-                                        # 提取天气描述
-                                        if "。" in description:
-                                            weather_text = description.split("。")[0]
-                                            weather_data["now"]["text"] = weather_text
-            
-            print(f"✅ 中央气象署 {city_name} 乡镇预报获取成功")
+        # 乡镇预报的当前时段与36小时预报同一时间开始时，用更细的数据更新天气和降雨机率
+        # （后续3小时时段只覆盖12小时时段的一部分，不用于更新）
+        # 温度按 DataTime 取值，序列开头可能是只有温度的时点，天气和降雨机率各取其第一个时段
+        text_period = next((period for period in detailed if period.text), None)
+        if text_period is not None:
+            entry = hourly_index.get(text_period.fx_time)
+            if entry is not None:
+                entry.text = text_period.text
+                entry.icon = text_period.icon
+        precip_period = next((period for period in detailed if period.precip is not None), None)
+        if precip_period is not None:
+            entry = hourly_index.get(precip_period.fx_time)
+            if entry is not None:
+                entry.precip = precip_period.precip
+        
+        print(f"✅ 中央气象署 {city_name} 乡镇预报获取成功")
         
         # 3. 获取7天预报 - 使用36小时预报数据构建
         # 由于中央气象署的7天预报API可能不稳定，我们使用36小时预报来构建
@@ -206,10 +135,11 @@ def fetch_cwa_weather(city_name, city_config):
             # 使用前几个小时的数据作为今日数据
             today_hourly = weather_data["hourly"][:2]  # 取前2个小时的数据作为今日
             tomorrow_hourly = weather_data["hourly"][2:] if len(weather_data["hourly"]) > 2 else []
+            today_date, tomorrow_date = _forecast_dates(weather_data["hourly"])
             
             # 构建今日数据 - 使用36小时预报的MinT/MaxT数据
             if today_hourly:
-                today_weather = today_hourly[0]["text"] if today_hourly else "晴"
+                today_weather = today_hourly[0].text if today_hourly else "晴"
                 
                 # 从hourly数据中提取今日的最高/最低温度（来自36小时预报的MinT/MaxT）
                 today_temp_max = 0
@@ -217,49 +147,49 @@ def fetch_cwa_weather(city_name, city_config):
                 
                 for h in today_hourly:
                     # 优先使用MinT/MaxT字段，如果没有则使用temp字段
-                    if h.get("tempMax") and h["tempMax"].isdigit():
-                        today_temp_max = max(today_temp_max, int(h["tempMax"]))
-                    elif h.get("temp") and h["temp"].isdigit():
-                        today_temp_max = max(today_temp_max, int(h["temp"]))
+                    if h.temp_max:
+                        today_temp_max = max(today_temp_max, h.temp_max)
+                    elif h.temp:
+                        today_temp_max = max(today_temp_max, h.temp)
                     
-                    if h.get("tempMin") and h["tempMin"].isdigit():
+                    if h.temp_min:
                         if today_temp_min == 0:  # 首次设置
-                            today_temp_min = int(h["tempMin"])
+                            today_temp_min = h.temp_min
                         else:
-                            today_temp_min = min(today_temp_min, int(h["tempMin"]))
-                    elif h.get("temp") and h["temp"].isdigit() and today_temp_min == 0:
-                        today_temp_min = int(h["temp"])
+                            today_temp_min = min(today_temp_min, h.temp_min)
+                    elif h.temp and today_temp_min == 0:
+                        today_temp_min = h.temp
                 
                 # 构建today字段，供今日天气摘要使用
                 weather_data["today"] = {
                     "hourly": today_hourly,
-                    "tempMax": str(today_temp_max) if today_temp_max > 0 else "32",
-                    "tempMin": str(today_temp_min) if today_temp_min > 0 else "27"
+                    "tempMax": today_temp_max if today_temp_max > 0 else 32,
+                    "tempMin": today_temp_min if today_temp_min > 0 else 27
                 }
                 
-                weather_data["weekly"].append({
-                    "fxDate": "2025-07-30",
-                    "textDay": today_weather,
-                    "textNight": today_weather,
-                    "tempMax": str(today_temp_max) if today_temp_max > 0 else "25",
-                    "tempMin": str(today_temp_min) if today_temp_min > 0 else "20",
-                    "precip": today_hourly[0].get("precip", "20")
-                })
+                weather_data["weekly"].append(DailyForecast(
+                    fx_date=today_date,
+                    text_day=today_weather,
+                    text_night=today_weather,
+                    temp_max=today_temp_max if today_temp_max > 0 else 25,
+                    temp_min=today_temp_min if today_temp_min > 0 else 20,
+                    precip=today_hourly[0].precip
+                ))
             
             # 构建明日数据
             if tomorrow_hourly:
-                tomorrow_temp_max = max([int(h["temp"]) for h in tomorrow_hourly if h["temp"] and h["temp"].isdigit()], default=0)
-                tomorrow_temp_min = min([int(h["temp"]) for h in tomorrow_hourly if h["temp"] and h["temp"].isdigit()], default=0)
-                tomorrow_weather = tomorrow_hourly[0]["text"] if tomorrow_hourly else "晴"
+                tomorrow_temp_max = max([h.temp for h in tomorrow_hourly if h.temp], default=0)
+                tomorrow_temp_min = min([h.temp for h in tomorrow_hourly if h.temp], default=0)
+                tomorrow_weather = tomorrow_hourly[0].text if tomorrow_hourly else "晴"
                 
-                weather_data["weekly"].append({
-                    "fxDate": "2025-07-31",
-                    "textDay": tomorrow_weather,
-                    "textNight": tomorrow_weather,
-                    "tempMax": str(tomorrow_temp_max) if tomorrow_temp_max > 0 else "26",
-                    "tempMin": str(tomorrow_temp_min) if tomorrow_temp_min > 0 else "21",
-                    "precip": tomorrow_hourly[0].get("precip", "30")
-                })
+                weather_data["weekly"].append(DailyForecast(
+                    fx_date=tomorrow_date,
+                    text_day=tomorrow_weather,
+                    text_night=tomorrow_weather,
+                    temp_max=tomorrow_temp_max if tomorrow_temp_max > 0 else 26,
+                    temp_min=tomorrow_temp_min if tomorrow_temp_min > 0 else 21,
+                    precip=tomorrow_hourly[0].precip
+                ))
         
         print(f"✅ 中央气象署 {city_name} 7天预报构建成功")
         
@@ -267,45 +197,40 @@ def fetch_cwa_weather(city_name, city_config):
         # 使用乡镇预报中的实时数据作为主要来源
         if not weather_data["now"]:
             # 如果没有从乡镇预报获取到实时数据，尝试从观测站获取
-            url = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/O-A0001-001"
-            params = {
-                "Authorization": get_cwa_api_key(),
-                "format": "JSON",
-                "locationName": city_config["cwa_id"].replace("市", ""),  # 去掉"市"字
-                "elementName": "TEMP,HUMD,WDSD"
-            }
-            
-            resp = safe_request(url, params=params, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("success") == "true":
-                    records = data.get("records", {})
-                    location_data = records.get("location", [])
+            data = fetch_dataset(
+                "O-A0001-001",
+                timeout=10,
+                locationName=city_config["cwa_id"].replace("市", ""),  # 去掉"市"字
+                elementName="TEMP,HUMD,WDSD"
+            )
+            if data.get("success") == "true":
+                records = data.get("records", {})
+                location_data = records.get("location", [])
+                
+                if location_data:
+                    location = location_data[0]
+                    weather_elements = location.get("weatherElement", [])
                     
-                    if location_data:
-                        location = location_data[0]
-                        weather_elements = location.get("weatherElement", [])
+                    for element in weather_elements:
+                        element_name = element.get("elementName", "")
+                        element_value = element.get("elementValue", "")
                         
-                        for element in weather_elements:
-                            element_name = element.get("elementName", "")
-                            element_value = element.get("elementValue", "")
-                            
-                            if element_name == "TEMP":
-                                weather_data["now"]["temp"] = element_value
-                            elif element_name == "HUMD":
-                                weather_data["now"]["humidity"] = element_value
-                            elif element_name == "WDSD":
-                                weather_data["now"]["windSpeed"] = element_value
+                        if element_name == "TEMP":
+                            weather_data["now"]["temp"] = parse_float(element_value)
+                        elif element_name == "HUMD":
+                            weather_data["now"]["humidity"] = parse_float(element_value)
+                        elif element_name == "WDSD":
+                            weather_data["now"]["windSpeed"] = parse_float(element_value)
         
         # 如果还是没有实时数据，从小时数据中获取最新的作为实时数据
         if not weather_data["now"] and weather_data["hourly"]:
             latest_hourly = weather_data["hourly"][0]  # 最新的小时数据
             weather_data["now"] = {
-                "temp": latest_hourly.get("temp", "25"),
-                "text": latest_hourly.get("text", "晴"),
-                "humidity": "65",  # 默认值
-                "windSpeed": "5",  # 默认值
-                "precip": latest_hourly.get("precip", "20")
+                "temp": latest_hourly.temp,
+                "text": latest_hourly.text,
+                "humidity": 65,  # 默认值
+                "windSpeed": 5,  # 默认值
+                "precip": latest_hourly.precip
             }
         
         print(f"✅ 中央气象署 {city_name} 实时数据获取成功")
@@ -316,4 +241,10 @@ def fetch_cwa_weather(city_name, city_config):
     except Exception as e:
         print(f"❌ 获取中央气象署 {city_name} 数据失败: {e}")
     
-    return weather_data 
\ No newline at end of file
+    return weather_data 
+
+async def fetch_cwa_weather_async(city_name, city_config):
+    """fetch_cwa_weather 的异步版本：异步下载，解析放到线程中执行"""
+    with dataset_run():
+        await prefetch_datasets_async(city_datasets(city_config))
+        return await asyncio.to_thread(fetch_cwa_weather, city_name, city_config)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入变化检测测试
+新增预警、已解除预警、预报变化各自被识别；输入未变化（包括观测预警只有观测时间更新）时没有变化
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import change_detector, city_config
+from services.change_detector import detect_changes, diff_inputs, has_changes, save_state, snapshot_inputs
+from services.models import DailyForecast, ForecastPeriod, WeatherWarning
+
+def _station_alert(obs_time="2026-10-18 12:00:00"):
+    return WeatherWarning(
+        title="高温观测预警", text="臺北观测站温度达36.0°C，请注意防暑", city="臺北",
+        type="高温", source="CWA观测站", station_id="466920", obs_time=obs_time
+    )
+
+def _special_report(issue_time="2026-10-18 08:00:00"):
+    return WeatherWarning(
+        title="大雨特報", text="臺北市发布大雨特報", city="臺北市",
+        type="特报", source="CWA特报系统", issue_time=issue_time
+    )
+
+def _data(warnings, text="多雲", precip=20, weekly_text="晴"):
+    return {
+        "台北市": {
+            "hourly": [ForecastPeriod("2026-10-18 06:00:00", text=text, temp=30, precip=precip)],
+            "weekly": [DailyForecast("2026-10-19", text_day=weekly_text, temp_min=24, temp_max=31, precip=10)]
+        },
+        "warnings": warnings
+    }
+
+def _diff(previous, current):
+    return diff_inputs(snapshot_inputs(previous), snapshot_inputs(current))
+
+def test_unchanged_inputs_have_no_changes():
+    data = _data([_station_alert(), _special_report()])
+    assert not has_changes(_diff(data, data))
+
+def test_station_alert_new_observation_is_not_a_change():
+    previous = _data([_station_alert("2026-10-18 12:00:00")])
+    current = _data([_station_alert("2026-10-18 12:10:00")])
+    diff = _diff(previous, current)
+    assert diff["new_warnings"] == [] and diff["cleared_warnings"] == []
+    assert not has_changes(diff)
+
+def test_new_and_cleared_warnings():
+    diff = _diff(_data([_station_alert()]), _data([_special_report()]))
+    assert [w["title"] for w in diff["new_warnings"]] == ["大雨特報"]
+    assert [w["title"] for w in diff["cleared_warnings"]] == ["高温观测预警"]
+    assert diff["changed_forecasts"] == []
+    assert has_changes(diff)
+
+def test_reissued_report_is_new():
+    # 天气特报按发布时间区分：重新发布算新增，旧的一条算解除
+    diff = _diff(_data([_special_report("2026-10-18 08:00:00")]), _data([_special_report("2026-10-18 14:00:00")]))
+    assert len(diff["new_warnings"]) == 1 and len(diff["cleared_warnings"]) == 1
+
+def test_changed_forecast():
+    diff = _diff(_data([], text="多雲", precip=20), _data([], text="短暫陣雨", precip=70))
+    assert diff["changed_forecasts"] == [("台北市", "2026-10-18 06:00:00", ["多雲", "30", "20"], ["短暫陣雨", "30", "70"])]
+    assert diff["new_warnings"] == [] and diff["cleared_warnings"] == []
+
+def test_changed_weekly_forecast():
+    diff = _diff(_data([], weekly_text="晴"), _data([], weekly_text="陣雨"))
+    assert [(city, period) for city, period, _, _ in diff["changed_forecasts"]] == [("台北市", "2026-10-19")]
+
+def test_new_forecast_period_is_not_a_change():
+    previous = _data([])
+    current = _data([])
+    current["台北市"]["hourly"].append(ForecastPeriod("2026-10-18 18:00:00", text="晴", temp=25, precip=0))
+    assert not has_changes(_diff(previous, current))
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(city_config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(change_detector, "CHANGE_DETECTION_ENABLED", True)
+    return tmp_path
+
+def test_detect_changes_against_saved_state(cache_dir):
+    snapshot, diff = detect_changes(_data([_station_alert("2026-10-18 12:00:00")]))
+    assert diff is None  # 首次运行没有上一次状态
+    save_state(snapshot)
+
+    _, diff = detect_changes(_data([_station_alert("2026-10-18 12:10:00")]))
+    assert diff is not None and not has_changes(diff)
+
+    _, diff = detect_changes(_data([_station_alert(), _special_report()], precip=80))
+    assert [w["title"] for w in diff["new_warnings"]] == ["大雨特報"]
+    assert len(diff["changed_forecasts"]) == 1
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词匹配测试
+乡镇危险天气关键词与36小时预报特殊天气关键词：列表顺序即优先级，被更长关键词覆盖的命中不计
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.keyword_matcher import KeywordMatcher
+from services.warning_fetcher import (
+    TOWNSHIP_DANGER_KEYWORDS, FORECAST_WARNING_CONDITIONS,
+    TOWNSHIP_DANGER_MATCHER, FORECAST_WARNING_MATCHER
+)
+
+@pytest.mark.parametrize("text, expected", [
+    ("大雷雨", ("大雷雨", "大雷雨即时讯息")),
+    ("午後短暫雷陣雨", ("雷陣雨", "雷阵雨提醒")),
+    ("短暫陣雨或雷雨", ("雷雨", "雷雨提醒")),
+    ("陰短暫陣雨或雷雨有局部大雨", ("大雨", "大雨特报")),
+    ("大豪雨", ("豪雨", "豪雨特报")),
+    ("颱風外圍環流", ("颱風", "台风消息")),
+    ("多雲", None),
+    ("", None),
+])
+def test_township_danger_first(text, expected):
+    assert TOWNSHIP_DANGER_MATCHER.first(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("大雷雨", ("大雷雨", "大雷雨警告")),
+    ("午後短暫雷陣雨", ("雷陣雨", "雷阵雨提醒")),
+    ("短暫陣雨或雷雨", ("雷雨", "雷雨提醒")),
+    ("多雲短暫陣雨", ("陣雨", "阵雨提醒")),
+    ("陰有雷陣雨或大雨", ("大雨", "大雨特报")),
+    ("暴風雨", ("暴風雨", "暴风雨警告")),
+    ("晴", None),
+])
+def test_forecast_warning_first(text, expected):
+    assert FORECAST_WARNING_MATCHER.first(text) == expected
+
+def test_longer_keyword_covers_shorter():
+    # 大雷雨覆盖雷雨，雷陣雨覆盖陣雨；keywords_in 仍等价于逐个 keyword in text
+    assert TOWNSHIP_DANGER_MATCHER.classify("大雷雨") == [("大雷雨", "大雷雨即时讯息")]
+    assert FORECAST_WARNING_MATCHER.classify("雷陣雨") == [("雷陣雨", "雷阵雨提醒")]
+    assert FORECAST_WARNING_MATCHER.keywords_in("大雷雨") == {"大雷雨", "雷雨"}
+
+def test_classify_orders_by_list_priority():
+    text = "陣雨或雷雨，局部大雷雨，山區有濃霧"
+    assert [keyword for keyword, _ in FORECAST_WARNING_MATCHER.classify(text)] == ["雷雨", "大雷雨", "陣雨", "濃霧"]
+
+@pytest.mark.parametrize("pairs", [TOWNSHIP_DANGER_KEYWORDS, FORECAST_WARNING_CONDITIONS])
+def test_keywords_in_matches_substring_search(pairs):
+    matcher = KeywordMatcher(pairs)
+    keywords = [keyword for keyword, _ in pairs]
+    for text in ["大雷雨", "午後短暫雷陣雨", "陰短暫陣雨或雷雨有局部大雨", "暴風雨伴隨冰雹", "多雲時晴"]:
+        assert matcher.keywords_in(text) == {keyword for keyword in keywords if keyword in text}
+        assert matcher.search(text) == any(keyword in text for keyword in keywords)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RSS 订阅写入测试
+内容未变化时不重写文件；条目数不超过保留上限；minidom 生成的已有条目原样读回
+"""
+
+import os
+import sys
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import rss_writer
+from utils.rss_writer import write_rss
+
+@pytest.fixture
+def feed_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "weather.xml")
+    monkeypatch.setattr(rss_writer, "RSS_PATH", path)
+    return path
+
+def _items(path):
+    channel = ET.parse(path).getroot().find("channel")
+    return [
+        (item.findtext("title"), item.findtext("guid"), item.findtext("description"))
+        for item in channel.findall("item")
+    ]
+
+def _minidom_feed(path, items):
+    """按早期 minidom 版本的格式写订阅（toprettyxml 缩进，描述为 CDATA）"""
+    doc = minidom.getDOMImplementation().createDocument(None, "rss", None)
+    rss = doc.documentElement
+    rss.setAttribute("version", "2.0")
+    rss.setAttribute("xmlns:atom", "http://www.w3.org/2005/Atom")
+    channel = doc.createElement("channel")
+    rss.appendChild(channel)
+
+    def el(tag, text):
+        node = doc.createElement(tag)
+        node.appendChild(doc.createTextNode(text))
+        return node
+
+    channel.appendChild(el("title", "天气快讯"))
+    channel.appendChild(el("link", rss_writer.FEED_LINK))
+    channel.appendChild(el("description", "台北新北天气、大雨城市与预警"))
+    for title, guid_text, html_description in items:
+        item = doc.createElement("item")
+        item.appendChild(el("title", title))
+        item.appendChild(el("pubDate", "Sat, 17 Oct 2026 00:00:00 GMT"))
+        guid = doc.createElement("guid")
+        guid.setAttribute("isPermaLink", "false")
+        guid.appendChild(doc.createTextNode(guid_text))
+        item.appendChild(guid)
+        description = doc.createElement("description")
+        description.appendChild(doc.createCDATASection(html_description))
+        item.appendChild(description)
+        channel.appendChild(item)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(doc.toprettyxml(indent="  "))
+
+def test_identical_content_is_not_rewritten(feed_path):
+    assert write_rss("台北 多云", "【台北市】今日天气：多云\n⚠️ 当前预警摘要（10月18日 08:00）：无")
+    with open(feed_path, "rb") as f:
+        first = f.read()
+    first_mtime = os.stat(feed_path).st_mtime_ns
+
+    # 只有摘要生成时间不同，视为相同内容
+    assert not write_rss("台北 多云", "【台北市】今日天气：多云\n⚠️ 当前预警摘要（10月18日 09:00）：无")
+    with open(feed_path, "rb") as f:
+        assert f.read() == first
+    assert os.stat(feed_path).st_mtime_ns == first_mtime
+    assert len(_items(feed_path)) == 1
+
+def test_item_count_is_capped(feed_path):
+    for number in range(5):
+        assert write_rss(f"第{number}次", f"内容 {number}", max_items=3)
+    items = _items(feed_path)
+    assert len(items) == 3
+    # 最新条目在前，最旧的两条被移出
+    assert [description for _, _, description in items] == ["内容 4", "内容 3", "内容 2"]
+    assert len({guid for _, guid, _ in items}) == 3
+
+def test_minidom_items_are_kept_intact(feed_path):
+    legacy = [
+        ("旧条目 & 预警（未来 15 小时预报）", "weather-20261017T000000", "【台北市】阵雨<br>⚠️ 豪雨 <b>特报</b>"),
+        ("更早的条目", "weather-20261016T000000", "多云<br>无预警"),
+    ]
+    _minidom_feed(feed_path, legacy)
+    with open(feed_path, "r", encoding="utf-8") as f:
+        fragments = rss_writer._ITEM_PATTERN.findall(f.read())
+
+    assert write_rss("台北 大雨", "【台北市】今日天气：大雨")
+    items = _items(feed_path)
+    assert len(items) == 3
+    assert items[0][2] == "【台北市】今日天气：大雨"
+    assert items[1:] == legacy
+
+    # 已有条目片段逐字保留
+    with open(feed_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    assert all(fragment in content for fragment in fragments)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻调度测试
+轮询间隔与磁盘缓存TTL相同时，每次到期的轮询都必须向服务器发起（条件）请求
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer
+from services import city_config, cwa_datastore, http_cache
+from services.scheduler import DatasetScheduler, dataset_interval
+
+DATASET_ID = "E-A0015-001"
+
+def _earthquakes(number):
+    return ('{"success": "true", "records": {"Earthquake": [{"EarthquakeNo": %d}]}}' % number).encode("utf-8")
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    with StubServer({DATASET_ID: _earthquakes(1)}) as stub:
+        monkeypatch.setattr(cwa_datastore, "CWA_DATASTORE_URL", f"{stub.cwa_api_base}/v1/rest/datastore")
+        monkeypatch.setattr(city_config, "CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", True)
+        http_cache.reset_stats()
+        yield stub
+
+def test_every_due_poll_reaches_upstream(server):
+    # 前提：轮询间隔不超过TTL，两次轮询之间磁盘缓存仍在有效期内
+    interval = dataset_interval(DATASET_ID)
+    assert interval <= http_cache.dataset_ttl(DATASET_ID)
+
+    scheduler = DatasetScheduler([(DATASET_ID, {}, 5)])
+    requests = []
+    for poll in range(4):
+        changed = scheduler.poll(now=poll * interval)
+        requests.append(server.requests)
+        assert changed == ([DATASET_ID] if poll == 0 else [])
+
+    # 每次轮询各一个请求；首次完整下载，之后均为304重新验证
+    assert requests == [1, 2, 3, 4]
+    assert http_cache.get_stats() == {"hit": 0, "revalidated": 3, "miss": 1}
+
+def test_poll_detects_update_within_ttl(server):
+    interval = dataset_interval(DATASET_ID)
+    scheduler = DatasetScheduler([(DATASET_ID, {}, 5)])
+    assert scheduler.poll(now=0) == [DATASET_ID]
+
+    server.payloads[DATASET_ID] = _earthquakes(2)
+    assert scheduler.poll(now=interval) == [DATASET_ID]
+    # 未到期的数据集不发起请求
+    assert scheduler.poll(now=interval + 1) == []
+    assert server.requests == 2
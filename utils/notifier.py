@@ -2,36 +2,79 @@ import os
 import requests
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from services.http_client import get_async_http_client
+from services.metrics import stage, incr
 
 load_dotenv()
 BARK_KEY = os.getenv("BARK_KEY")
 SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK")
 
+def _bark_url(title: str, body: str) -> str:
+    return f"https://api.day.app/{BARK_KEY}/{quote_plus(title)}/{quote_plus(body)}"
+
+
+def _slack_payload(title: str, body: str) -> dict:
+    plain_body = body.replace("<br>", "\n")
+    return {
+        "text": f"*{title}*\n{plain_body}",
+    }
+
+
+@stage("notify.bark")
 def send_bark(title: str, body: str):
     """通过 BARK 推送一次通知。"""
     if not BARK_KEY:
         return
-    url = f"https://api.day.app/{BARK_KEY}/{quote_plus(title)}/{quote_plus(body)}"
+    url = _bark_url(title, body)
     try:
         r = requests.get(url, timeout=10)
         r.raise_for_status()
         print("[Notifier] ✅ BARK 推送成功")
     except Exception as e:
         print(f"[Notifier] ❌ BARK 推送失败：{e}")
+        incr("notify.bark_failed")
 
 
+@stage("notify.slack")
 def send_slack(title: str, body: str):
     """通过 Slack Incoming Webhook 推送一次通知。"""
     if not SLACK_WEBHOOK:
         print("[Notifier] No SLACK_WEBHOOK set, skipping.")
         return
-    plain_body = body.replace("<br>", "\n")
-    payload = {
-        "text": f"*{title}*\n{plain_body}",
-    }
+    payload = _slack_payload(title, body)
     try:
         r = requests.post(SLACK_WEBHOOK, json=payload, timeout=10)
         r.raise_for_status()
         print("[Notifier] ✅ Slack 推送成功")
     except Exception as e:
         print(f"[Notifier] ❌ Slack 推送失败：{e}")
+        incr("notify.slack_failed")
+
+
+@stage("notify.bark")
+async def send_bark_async(title: str, body: str):
+    """send_bark 的异步版本。"""
+    if not BARK_KEY:
+        return
+    try:
+        r = await get_async_http_client().get(_bark_url(title, body), timeout=10)
+        r.raise_for_status()
+        print("[Notifier] ✅ BARK 推送成功")
+    except Exception as e:
+        print(f"[Notifier] ❌ BARK 推送失败：{e}")
+        incr("notify.bark_failed")
+
+
+@stage("notify.slack")
+async def send_slack_async(title: str, body: str):
+    """send_slack 的异步版本。"""
+    if not SLACK_WEBHOOK:
+        print("[Notifier] No SLACK_WEBHOOK set, skipping.")
+        return
+    try:
+        r = await get_async_http_client().post(SLACK_WEBHOOK, json=_slack_payload(title, body), timeout=10)
+        r.raise_for_status()
+        print("[Notifier] ✅ Slack 推送成功")
+    except Exception as e:
+        print(f"[Notifier] ❌ Slack 推送失败：{e}")
+        incr("notify.slack_failed")
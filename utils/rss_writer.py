@@ -1,63 +1,175 @@
 import os
+import re
+import hashlib
 from datetime import datetime
-from xml.dom import minidom
 from dotenv import load_dotenv
+from services.city_config import CITIES
+from services.metrics import stage
 
 load_dotenv()
 
-RSS_PATH = os.path.join("docs", "weather.xml")
+FEEDS_DIR = "docs"
+RSS_PATH = os.path.join(FEEDS_DIR, "weather.xml")
+WARNINGS_FEED = "warnings.xml"
 FEED_LINK = os.getenv("RSS_FEED_LINK", "https://eliu-lotso.github.io/tw-weather/weather.xml")
 
+# 合并订阅的频道信息：(标题, 链接, 描述)
+DEFAULT_CHANNEL = ("天气快讯", FEED_LINK, "台北新北天气、大雨城市与预警")
 
-def write_rss(title: str, description: str, forecast_hours: int = 15):
-    impl = minidom.getDOMImplementation()
-    doc = impl.createDocument(None, "rss", None)
-    rss = doc.documentElement
-    rss.setAttribute("version", "2.0")
-    rss.setAttribute("xmlns:atom", "http://www.w3.org/2005/Atom")
+# 订阅中保留的最近条目数
+RSS_MAX_ITEMS = int(os.getenv("RSS_MAX_ITEMS", "20"))
 
-    channel = doc.createElement("channel")
-    rss.appendChild(channel)
+_ITEM_PATTERN = re.compile(r"<item>.*?</item>", re.S)
+_DESCRIPTION_PATTERN = re.compile(r"<description>(.*?)</description>", re.S)
+_CDATA_PATTERN = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.S)
 
-    def el(tag, text):
-        node = doc.createElement(tag)
-        node.appendChild(doc.createTextNode(text))
-        return node
+# 摘要自身的生成时间戳（预警摘要标题中的时间），不参与内容比较；
+# 台风定位、预警发布等正文中的时间属于内容，不屏蔽
+_VOLATILE_PATTERN = re.compile(r"(当前预警摘要（)\d{2}月\d{2}日 \d{2}:\d{2}(）)")
+
+
+def _content_digest(html_description):
+    """条目内容摘要：相同天气内容得到相同摘要"""
+    stable = _VOLATILE_PATTERN.sub(r"\1\2", html_description)
+    return hashlib.sha1(stable.encode("utf-8")).hexdigest()
+
+
+def _read_items(path):
+    """读取现有订阅中的条目片段（原样保留，不重新渲染）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return _ITEM_PATTERN.findall(f.read())
+    except OSError:
+        return []
+
+
+def _item_description(fragment):
+    """从条目片段中取出描述（CDATA 内容）"""
+    match = _DESCRIPTION_PATTERN.search(fragment)
+    if not match:
+        return ""
+    return "".join(_CDATA_PATTERN.findall(match.group(1)))
+
+
+def _escape(text):
+    """转义文本和属性值（与 minidom 输出一致）"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _write_item(f, title, pub_date, guid_text, html_description):
+    """写入一个条目（缩进与 toprettyxml 一致，便于与已有条目片段拼接）"""
+    f.write("    <item>\n")
+    f.write(f"      <title>{_escape(title)}</title>\n")
+    f.write(f"      <pubDate>{_escape(pub_date)}</pubDate>\n")
+    f.write(f"      <guid isPermaLink=\"false\">{_escape(guid_text)}</guid>\n")
+    f.write(f"      <description><![CDATA[{html_description}]]></description>\n")
+    f.write("    </item>\n")
+
+
+def _feed_link(filename):
+    """与 RSS_FEED_LINK 同目录的订阅地址"""
+    return f"{FEED_LINK.rsplit('/', 1)[0]}/{filename}"
+
+
+def _to_html(text):
+    """摘要文本转为条目描述HTML；CDATA 中不能出现 "]]>"，描述为HTML，转义为实体即可"""
+    return text.replace('\n', '<br>').replace("]]>", "]]&gt;")
+
+
+def _write_feed(f, channel, new_items, old_items=()):
+    """
+    流式写出完整订阅
+    :param channel: 频道信息 (标题, 链接, 描述)
+    :param new_items: 需要渲染的条目 [(标题, 发布时间, GUID, HTML描述), ...]
+    :param old_items: 原样拼接在其后的已有条目片段
+    """
+    channel_title, channel_link, channel_description = channel
+    f.write('<?xml version="1.0" ?>\n')
+    f.write('<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">\n')
+    f.write("  <channel>\n")
+    f.write(f"    <title>{_escape(channel_title)}</title>\n")
+    f.write(f"    <link>{_escape(channel_link)}</link>\n")
+    f.write(f"    <description>{_escape(channel_description)}</description>\n")
+    f.write(f'    <atom:link href="{_escape(channel_link)}" rel="self" type="application/rss+xml"/>\n')
+    for item in new_items:
+        _write_item(f, *item)
+    for fragment in old_items:
+        f.write(f"    {fragment}\n")
+    f.write("  </channel>\n")
+    f.write("</rss>\n")
+
+
+def _update_feed(path, channel, item_title, html_description, max_items):
+    """
+    追加一条条目到订阅文件，只保留最近 max_items 条
+    内容与上一条相同时不写文件；已有条目原样保留，GUID 不变
+    新条目的 GUID 由内容摘要加发布时间组成，内容变回之前的版本时也是新的 GUID，
+    已读过旧条目的阅读器不会把重新发布的内容当作已读
+    """
+    digest = _content_digest(html_description)
+
+    old_items = _read_items(path)
+    if old_items and _content_digest(_item_description(old_items[0])) == digest:
+        print(f"⏭️ RSS 内容未变化，跳过写入：{path}")
+        return False
+    old_items = old_items[:max(max_items - 1, 0)]
 
     now = datetime.utcnow()
-    timestamp = now.strftime("%Y%m%dT%H%M%S")
     pub_date = now.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    guid_text = f"weather-{digest[:16]}-{now.strftime('%Y%m%d%H%M%S')}"
 
+    # 先写临时文件再替换，避免读取方看到半个文件
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        _write_feed(f, channel, [(item_title, pub_date, guid_text, html_description)], old_items)
+    os.replace(tmp_path, path)
+    print(f"✅ RSS 写入完成：{path}（共 {len(old_items) + 1} 条）")
+    return True
+
+
+@stage("rss.write")
+def write_rss(title: str, description: str, forecast_hours: int = 15, max_items: int = None):
+    """追加一条天气条目到合并订阅 docs/weather.xml"""
+    max_items = RSS_MAX_ITEMS if max_items is None else max_items
     report_range = f"（未来 {forecast_hours} 小时预报）"
-    full_title = title + report_range
-
-    channel.appendChild(el("title", "天气快讯"))
-    channel.appendChild(el("link", FEED_LINK))
-    channel.appendChild(el("description", "台北新北天气、大雨城市与预警"))
-
-    atom_link = doc.createElement("atom:link")
-    atom_link.setAttribute("href", FEED_LINK)
-    atom_link.setAttribute("rel", "self")
-    atom_link.setAttribute("type", "application/rss+xml")
-    channel.appendChild(atom_link)
-
-    item = doc.createElement("item")
-    item.appendChild(el("title", full_title))
-    item.appendChild(el("pubDate", pub_date))
-
-    guid = doc.createElement("guid")
-    guid.setAttribute("isPermaLink", "false")
-    guid.appendChild(doc.createTextNode(f"weather-{timestamp}"))
-    item.appendChild(guid)
-
-    desc = doc.createElement("description")
-    html_description = description.replace('\n', '<br>')
-    cdata = doc.createCDATASection(html_description)
-    desc.appendChild(cdata)
-    item.appendChild(desc)
-
-    channel.appendChild(item)
-
-    with open(RSS_PATH, "w", encoding="utf-8") as f:
-        f.write(doc.toprettyxml(indent="  "))
-    print(f"✅ RSS 写入完成：{RSS_PATH}")
+    return _update_feed(RSS_PATH, DEFAULT_CHANNEL, title + report_range, _to_html(description), max_items)
+
+
+@stage("rss.write")
+def write_feeds(title: str, sections: dict, forecast_hours: int = 15, max_items: int = None):
+    """
+    一次生成全部订阅：合并订阅、每个城市的订阅和仅预警订阅
+    各部分只转换一次，预警片段在所有订阅间共用
+    :param sections: build_summary_sections 返回的摘要各部分
+    :return: 实际写入的订阅数
+    """
+    max_items = RSS_MAX_ITEMS if max_items is None else max_items
+    report_range = f"（未来 {forecast_hours} 小时预报）"
+
+    today = {city: _to_html(text) for city, text in sections["today"].items()}
+    future = {city: _to_html(text) for city, text in sections["future"].items()}
+    alerts = _to_html(sections["alerts"])
+
+    written = 0
+
+    # 合并订阅（与 compose_summary 的排版一致）
+    combined = "".join(f"{text}<br><br>" for text in today.values())
+    combined += "".join(f"{text}<br><br>" for text in future.values())
+    combined += alerts
+    written += _update_feed(RSS_PATH, DEFAULT_CHANNEL, title + report_range, combined, max_items)
+
+    # 各城市订阅
+    for city, city_config in CITIES.items():
+        parts = [part for part in (today.get(city), future.get(city)) if part]
+        if not parts:
+            continue
+        filename = f"weather-{city_config['slug']}.xml"
+        channel = (f"天气快讯 · {city}", _feed_link(filename), f"{city}天气与全台预警")
+        html_description = "<br><br>".join(parts + [alerts])
+        written += _update_feed(os.path.join(FEEDS_DIR, filename), channel, f"【{city}】{title}{report_range}", html_description, max_items)
+
+    # 仅预警订阅
+    channel = ("天气预警", _feed_link(WARNINGS_FEED), "台湾天气预警摘要")
+    written += _update_feed(os.path.join(FEEDS_DIR, WARNINGS_FEED), channel, f"【预警】{title}", alerts, max_items)
+
+    return written